@@ -1,7 +1,106 @@
+import importlib.util
 from motor.motor_asyncio import AsyncIOMotorClient
-from .config import MONGO_URI, DB_NAME
+from pymongo import ReadPreference, monitoring
+from .config import (
+    MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS, MONGO_READ_PREFERENCE, MONGO_COMPRESSORS,
+    MONGO_READ_ROUTING
+)
 
-client = AsyncIOMotorClient(MONGO_URI)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+if MONGO_READ_ROUTING not in READ_PREFERENCES:
+    raise ValueError(f"Unknown MONGO_READ_ROUTING '{MONGO_READ_ROUTING}'. Must be one of: {list(READ_PREFERENCES)}")
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.stats = {
+            "pools_created": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "checkout_failures": 0,
+            "in_use": 0,
+            "pool_clears": 0,
+            "checkout_wait_total_ms": 0.0,
+            "checkout_wait_max_ms": 0.0,
+            "checkout_wait_last_ms": 0.0,
+        }
+
+    def _record_wait(self, event):
+        wait_ms = event.duration * 1000
+        self.stats["checkout_wait_total_ms"] += wait_ms
+        self.stats["checkout_wait_max_ms"] = max(self.stats["checkout_wait_max_ms"], wait_ms)
+        self.stats["checkout_wait_last_ms"] = wait_ms
+
+    def pool_created(self, event):
+        self.stats["pools_created"] += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.stats["pool_clears"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.stats["connections_created"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.stats["connections_closed"] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.stats["checkout_failures"] += 1
+        self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        self.stats["checked_out"] += 1
+        self.stats["in_use"] += 1
+        self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        self.stats["in_use"] -= 1
+
+
+def available_compressors(requested):
+    return [c for c in requested if c in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[c])]
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+    }
+    compressors = available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return {key: value for key, value in options.items() if value is not None}
+
+
+pool_stats = PoolStatsListener()
+client = AsyncIOMotorClient(MONGO_URI, event_listeners=[pool_stats], **client_options())
 
 
 database = client[DB_NAME]
@@ -11,4 +110,42 @@ products_collection = database.get_collection("products")
 spaces_collection = database.get_collection("spaces")
 styles_collection = database.get_collection("styles")
 user_history_collection = database.get_collection("user_history")
+product_neighbors_collection = database.get_collection("product_neighbors")
+product_embeddings_collection = database.get_collection("product_embeddings")
+user_profiles_collection = database.get_collection("user_profiles")
+jobs_collection = database.get_collection("jobs")
+
+
+_read_handles = {}
+
+
+def read_collection(collection, fresh: bool = False):
+    if fresh or MONGO_READ_ROUTING == MONGO_READ_PREFERENCE:
+        return collection
+    handle = _read_handles.get(collection.full_name)
+    if handle is None:
+        handle = collection.with_options(read_preference=READ_PREFERENCES[MONGO_READ_ROUTING])
+        _read_handles[collection.full_name] = handle
+    return handle
+
+
+async def connect():
+    await client.admin.command("ping")
+
+
+def close():
+    client.close()
+
 
+def pool_status() -> dict:
+    options = client_options()
+    attempts = pool_stats.stats["checked_out"] + pool_stats.stats["checkout_failures"]
+    return {
+        **pool_stats.stats,
+        "checkout_wait_avg_ms": pool_stats.stats["checkout_wait_total_ms"] / attempts if attempts else 0.0,
+        "max_pool_size": options["maxPoolSize"],
+        "min_pool_size": options["minPoolSize"],
+        "read_preference": options["readPreference"],
+        "read_routing": MONGO_READ_ROUTING,
+        "compressors": options.get("compressors", "").split(",") if options.get("compressors") else [],
+    }
@@ -0,0 +1,95 @@
+import os
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from backend.api.db.database import database
+
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "1") == "1"
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "products": [
+        IndexModel([("spaces", ASCENDING), ("category", ASCENDING)], name="spaces_category"),
+        IndexModel([("styles", ASCENDING), ("category", ASCENDING)], name="styles_category"),
+        IndexModel([("purchase_link", ASCENDING)], name="purchase_link_unique", unique=True),
+    ],
+    "user_history": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "spaces": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "styles": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "product_neighbors": [
+        IndexModel([("neighbors", ASCENDING)], name="neighbors"),
+        IndexModel([("computed_at", ASCENDING)], name="computed_at"),
+    ],
+    "product_embeddings": [
+        IndexModel([("encoder", ASCENDING)], name="encoder"),
+    ],
+    "jobs": [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        IndexModel([("status", ASCENDING), ("heartbeat_at", ASCENDING)], name="status_heartbeat_at"),
+    ],
+}
+
+
+def _key(spec) -> tuple:
+    return tuple((field, int(direction)) for field, direction in spec.items())
+
+
+async def ensure_indexes() -> dict:
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        created, failed = [], {}
+        for model in models:
+            try:
+                created.extend(await collection.create_indexes([model]))
+            except OperationFailure as e:
+                failed[model.document["name"]] = e.details.get("errmsg", str(e)) if e.details else str(e)
+        report[collection_name] = {"ensured": created, "failed": failed}
+    return report
+
+
+async def index_report() -> dict:
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        existing = {}
+        async for index in collection.list_indexes():
+            existing[index["name"]] = _key(index["key"])
+
+        expected = {model.document["name"]: _key(model.document["key"]) for model in models}
+        present_keys = set(existing.values())
+
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+            unused = sorted(s["name"] for s in stats if s["name"] != "_id_" and s["accesses"]["ops"] == 0)
+        except OperationFailure:
+            unused = None
+
+        report[collection_name] = {
+            "missing": sorted(name for name, key in expected.items() if key not in present_keys),
+            "unexpected": sorted(name for name, key in existing.items() if name != "_id_" and key not in expected.values()),
+            "unused": unused,
+        }
+    return report
+
+
+async def ensure_indexes_on_startup():
+    if not ENSURE_INDEXES_ON_STARTUP:
+        return
+    try:
+        report = await ensure_indexes()
+    except Exception as e:
+        print(f"Index creation skipped: {e}")
+        return
+    for collection_name, result in report.items():
+        for name, error in result["failed"].items():
+            print(f"Index {collection_name}.{name} could not be created: {error}")
@@ -1,10 +1,41 @@
-from fastapi import APIRouter, FastAPI
-from backend.api.routers import recommendations, users, spaces, products, styles, auth, user_history
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, Response, status
+from backend.api.routers import recommendations, users, spaces, products, styles, auth, user_history, jobs
+from backend.api.services import similarity_service, categorization_service, ranking_cache_service, taxonomy_service, job_service
+from backend.api.ml.categorization import inference
+from backend.api.db import database
+from backend.api.db.indexes import ensure_indexes_on_startup
+from backend.api.dependencies.auth import is_admin
 from fastapi.middleware.cors import CORSMiddleware
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await database.connect()
+    except Exception as e:
+        print(f"MongoDB is not reachable yet: {e}")
+    await taxonomy_service.warm_up_taxonomy()
+    warm_ups = [
+        asyncio.create_task(ensure_indexes_on_startup()),
+        asyncio.create_task(similarity_service.warm_up_similarity_index()),
+        asyncio.create_task(categorization_service.warm_up_categorization()),
+        asyncio.create_task(ranking_cache_service.refresh_rankings_periodically()),
+        asyncio.create_task(job_service.monitor_jobs()),
+    ]
+    yield
+    for task in warm_ups:
+        task.cancel()
+    await job_service.shutdown()
+    inference.shutdown()
+    database.close()
+
+
 app = FastAPI(title="API",
     description="Una API con FastAPI con entidades de usuarios, espacios, productos y estilos",
-    version="1.0.0") 
+    version="1.0.0",
+    lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,10 +54,26 @@ api_router.include_router(styles.router)
 api_router.include_router(auth.router)
 api_router.include_router(user_history.router)
 api_router.include_router(recommendations.router)
+api_router.include_router(jobs.router)
 
 @api_router.get("/")
 def root():
     return {"message": "Bienvenido a mi API 🚀"}
 
+@api_router.get("/ready")
+def ready(response: Response):
+    categorization = categorization_service.categorization_status()
+    if not categorization["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        **categorization,
+        "similarity_backend": similarity_service.SIMILARITY_BACKEND,
+        "product_index_built": similarity_service.similarity_index().is_built,
+    }
+
+@api_router.get("/db/pool")
+def db_pool(current_user: str = Depends(is_admin)):
+    return database.pool_status()
+
 app.include_router(api_router)
 
@@ -0,0 +1,281 @@
+import copy
+import json
+import os
+import time
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FILTER_FIELDS = ("spaces", "styles", "category")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_to_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = np.flatnonzero(~sums.any(axis=1))
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    return np.concatenate([
+        np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), chunk_size)
+    ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+
+def filter_labels(metadata: dict, field: str) -> List[str]:
+    value = metadata.get(field)
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        exact_threshold: int = 4096,
+        train_sample: int = 50000,
+        rebuild_ratio: float = 0.2,
+        seed: int = 0
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.train_sample = train_sample
+        self.rebuild_ratio = rebuild_ratio
+        self.seed = seed
+        self.built_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        self.ids: List[str] = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.metadata: List[dict] = []
+        self.rows: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, str], np.ndarray] = {}
+        self._deleted = np.zeros(0, dtype=bool)
+        self._extra: Dict[str, Tuple[np.ndarray, dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self._extra)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._extra or product_id in self.rows
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_at is not None
+
+    def is_stale(self, max_age: Optional[float] = None) -> bool:
+        if not self.is_built:
+            return True
+        if max_age and time.time() - self.built_at > max_age:
+            return True
+        changed = len(self._extra) + int(self._deleted.sum())
+        return len(self.ids) > 0 and changed > self.rebuild_ratio * len(self.ids)
+
+    def invalidate(self):
+        self.built_at = None
+
+    def build(self, ids: List[str], vectors: np.ndarray, metadata: Optional[List[dict]] = None):
+        self._reset()
+        metadata = metadata or [{} for _ in ids]
+        if len(ids) == 0:
+            self.built_at = time.time()
+            return
+
+        vectors = normalize(vectors)
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(ids)))), len(ids))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors if len(vectors) <= self.train_sample else vectors[rng.choice(len(vectors), self.train_sample, replace=False)]
+        centroids = spherical_kmeans(sample, nlist, seed=self.seed)
+
+        assignments = assign_to_centroids(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+
+        self._set_arrays(
+            [ids[i] for i in order],
+            vectors[order],
+            centroids,
+            np.concatenate([[0], np.cumsum(counts)]),
+            [metadata[i] for i in order]
+        )
+        self.built_at = time.time()
+
+    def _set_arrays(self, ids, vectors, centroids, offsets, metadata):
+        self.ids = list(ids)
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.metadata = metadata
+        self.rows = {product_id: row for row, product_id in enumerate(self.ids)}
+        self._deleted = np.zeros(len(self.ids), dtype=bool)
+        self._masks = {}
+        for row, meta in enumerate(metadata):
+            for field in FILTER_FIELDS:
+                for label in filter_labels(meta, field):
+                    key = (field, str(label))
+                    if key not in self._masks:
+                        self._masks[key] = np.zeros(len(self.ids), dtype=bool)
+                    self._masks[key][row] = True
+
+    def upsert(self, product_id: str, vector: np.ndarray, metadata: Optional[dict] = None):
+        if not self.is_built:
+            return
+        self.remove(product_id)
+        self._extra[product_id] = (normalize(vector), metadata or {})
+
+    def remove(self, product_id: str):
+        self._extra.pop(product_id, None)
+        row = self.rows.get(product_id)
+        if row is not None:
+            self._deleted[row] = True
+
+    def snapshot(self) -> "IVFIndex":
+        snapshot = copy.copy(self)
+        snapshot.ids = list(self.ids)
+        snapshot.metadata = list(self.metadata)
+        snapshot.rows = dict(self.rows)
+        snapshot._masks = dict(self._masks)
+        snapshot._deleted = self._deleted.copy()
+        snapshot._extra = dict(self._extra)
+        return snapshot
+
+    def vector(self, product_id: str) -> Optional[np.ndarray]:
+        if product_id in self._extra:
+            return self._extra[product_id][0]
+        row = self.rows.get(product_id)
+        if row is None or self._deleted[row]:
+            return None
+        return np.asarray(self.vectors[row])
+
+    def most_similar(self, product_id: str, top_n: int = 5, filters: Optional[dict] = None) -> List[Tuple[str, float]]:
+        vector = self.vector(product_id)
+        if vector is None:
+            raise KeyError(product_id)
+        return self.search(vector, top_n, filters, exclude={product_id})
+
+    def top_k_table(self, k: int) -> Iterator[Tuple[str, List[Tuple[str, float]]]]:
+        for product_id in [*self.ids, *list(self._extra)]:
+            if product_id in self:
+                yield product_id, self.most_similar(product_id, k)
+
+    def search(self, vector: np.ndarray, top_n: int = 10, filters: Optional[dict] = None, exclude=None, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        query = normalize(vector)
+        exclude = set(exclude or ())
+        results = []
+
+        if len(self.ids):
+            rows = self._candidate_rows(query, self._filter_mask(filters), top_n + len(exclude), nprobe or self.nprobe)
+            excluded_rows = [self.rows[pid] for pid in exclude if pid in self.rows]
+            if excluded_rows:
+                rows = rows[~np.isin(rows, excluded_rows)]
+            scores = np.asarray(self.vectors[rows]) @ query
+            if len(rows) > top_n:
+                top = np.argpartition(-scores, top_n - 1)[:top_n]
+                rows, scores = rows[top], scores[top]
+            results = [(self.ids[row], float(score)) for row, score in zip(rows, scores)]
+
+        for product_id, (extra_vector, meta) in self._extra.items():
+            if product_id not in exclude and self._matches(meta, filters):
+                results.append((product_id, float(extra_vector @ query)))
+
+        return sorted(results, key=lambda pair: pair[1], reverse=True)[:top_n]
+
+    def _candidate_rows(self, query: np.ndarray, allowed: Optional[np.ndarray], wanted: int, nprobe: int) -> np.ndarray:
+        live = ~self._deleted if allowed is None else allowed & ~self._deleted
+        if live.sum() <= self.exact_threshold:
+            return np.flatnonzero(live)
+
+        lists = np.argsort(-(self.centroids @ query))
+        probed = 0
+        rows = np.empty(0, dtype=np.int64)
+        while probed < len(lists):
+            step = lists[probed:probed + nprobe]
+            probed += len(step)
+            new_rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in step])
+            rows = np.concatenate([rows, new_rows[live[new_rows]]])
+            if len(rows) >= wanted:
+                break
+        return rows
+
+    def _filter_mask(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        empty = np.zeros(len(self.ids), dtype=bool)
+        for field, values in filters.items():
+            if values is None:
+                continue
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            field_mask = np.zeros(len(self.ids), dtype=bool)
+            for value in values:
+                field_mask |= self._masks.get((field, str(value)), empty)
+            mask &= field_mask
+        return mask
+
+    @staticmethod
+    def _matches(metadata: dict, filters: Optional[dict]) -> bool:
+        for field, values in (filters or {}).items():
+            if values is None:
+                continue
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            if not {str(v) for v in values} & {str(label) for label in filter_labels(metadata, field)}:
+                return False
+        return True
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        extra_ids = list(self._extra)
+        ids = [pid for pid in self.ids if not self._deleted[self.rows[pid]]] + extra_ids
+        vectors = [np.asarray(self.vectors[self.rows[pid]]) for pid in ids[:len(ids) - len(extra_ids)]]
+        vectors += [self._extra[pid][0] for pid in extra_ids]
+        metadata = [self.metadata[self.rows[pid]] for pid in ids[:len(ids) - len(extra_ids)]]
+        metadata += [self._extra[pid][1] for pid in extra_ids]
+
+        if extra_ids or self._deleted.any():
+            stacked = np.stack(vectors) if vectors else np.empty((0, self.centroids.shape[1]), dtype=np.float32)
+            assignments = assign_to_centroids(stacked, self.centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=len(self.centroids))
+            self._set_arrays(
+                [ids[i] for i in order], stacked[order], self.centroids,
+                np.concatenate([[0], np.cumsum(counts)]), [metadata[i] for i in order]
+            )
+            self._extra = {}
+
+        np.save(os.path.join(directory, "vectors.npy"), np.asarray(self.vectors, dtype=np.float32))
+        np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+        np.save(os.path.join(directory, "offsets.npy"), self.offsets)
+        with open(os.path.join(directory, "rows.json"), "w") as f:
+            json.dump({"ids": self.ids, "metadata": self.metadata, "built_at": self.built_at}, f)
+
+    def load(self, directory: str, mmap: bool = True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(directory, "rows.json")) as f:
+            rows = json.load(f)
+        self._reset()
+        self._set_arrays(
+            rows["ids"],
+            np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, "centroids.npy")),
+            np.load(os.path.join(directory, "offsets.npy")),
+            rows["metadata"]
+        )
+        self.built_at = rows.get("built_at") or time.time()
@@ -1,8 +1,55 @@
-from sentence_transformers import SentenceTransformer, util
-from typing import List
+import os
+import threading
+import numpy as np
+from typing import Dict, List, Tuple
 from backend.api.db.database import spaces_collection, styles_collection
+from backend.api.services.taxonomy_service import cache_for
+from backend.api.ml.inference import InferenceExecutor
+from backend.api.ml.encoders import load_encoder
 
-model = SentenceTransformer("all-mpnet-base-v2")
+MODEL_NAME = "all-mpnet-base-v2"
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ENCODER_ONNX_FILE = os.getenv("ENCODER_ONNX_FILE")
+ENCODER_ID = f"{ENCODER_BACKEND}-{os.path.splitext(os.path.basename(ENCODER_ONNX_FILE))[0]}" if ENCODER_ONNX_FILE else ENCODER_BACKEND
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", 32))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 1))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 256))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 64))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 5))
+CATEGORIZATION_ENABLED = os.getenv("CATEGORIZATION_ENABLED", "true").lower() not in ("0", "false", "no")
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    if _model is None:
+        if not CATEGORIZATION_ENABLED:
+            raise RuntimeError("Categorization is disabled on this worker")
+        with _model_lock:
+            if _model is None:
+                _model = load_encoder(MODEL_NAME, ENCODER_BACKEND, ENCODER_ONNX_FILE)
+    return _model
+
+
+def is_model_loaded() -> bool:
+    return _model is not None
+
+
+def __getattr__(name):
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+inference = InferenceExecutor(
+    lambda texts: get_model().encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True),
+    workers=INFERENCE_WORKERS,
+    max_queue=INFERENCE_MAX_QUEUE,
+    max_batch=INFERENCE_MAX_BATCH,
+    max_wait=INFERENCE_MAX_WAIT_MS / 1000
+)
 
 category_labels = [
     "lighting",
@@ -20,11 +67,86 @@ category_labels = [
     "kitchen and tableware",
 ]
 
-def get_top_k_labels(description: str, candidates: List[str], embeddings, k=3) -> List[str]:
-    description_embedding = model.encode(description, convert_to_tensor=True)
-    cosine_scores = util.cos_sim(description_embedding, embeddings)[0]
-    top_results = cosine_scores.topk(k=k)
-    return [candidates[i] for i in top_results.indices]
+
+async def encode(texts: List[str]) -> np.ndarray:
+    return await inference.encode(texts)
+
+
+def _as_array(embeddings) -> np.ndarray:
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().cpu().numpy()
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+async def categorize_descriptions(
+    descriptions: List[str],
+    category_embeddings,
+    space_embeddings,
+    style_embeddings,
+    space_names,
+    style_names,
+    n_spaces=3,
+    n_styles=3,
+    description_embeddings=None
+) -> List[Tuple[str, List[str], List[str]]]:
+    if not descriptions:
+        return []
+    if description_embeddings is None:
+        description_embeddings = await encode(descriptions)
+    return rank_labels(
+        description_embeddings,
+        category_embeddings,
+        space_embeddings,
+        style_embeddings,
+        space_names,
+        style_names,
+        n_spaces=n_spaces,
+        n_styles=n_styles
+    )
+
+
+def rank_labels(
+    description_embeddings,
+    category_embeddings,
+    space_embeddings,
+    style_embeddings,
+    space_names,
+    style_names,
+    n_spaces=3,
+    n_styles=3
+) -> List[Tuple[str, List[str], List[str]]]:
+    description_embeddings = _as_array(description_embeddings)
+
+    groups = [
+        (category_labels, _as_array(category_embeddings), 1),
+        (space_names, _as_array(space_embeddings), n_spaces),
+        (style_names, _as_array(style_embeddings), n_styles),
+    ]
+    label_embeddings = np.concatenate([embeddings for _, embeddings, _ in groups if len(embeddings)])
+    scores = _normalize(description_embeddings) @ _normalize(label_embeddings).T
+
+    top_labels = []
+    start = 0
+    for names, embeddings, k in groups:
+        end = start + len(embeddings)
+        k = min(k, end - start)
+        if k > 0:
+            indices = np.argsort(-scores[:, start:end], axis=1, kind="stable")[:, :k].tolist()
+            top_labels.append([[names[i] for i in row] for row in indices])
+        else:
+            top_labels.append([[] for _ in range(len(description_embeddings))])
+        start = end
+
+    return [
+        (categories[0] if categories else None, spaces, styles)
+        for categories, spaces, styles in zip(*top_labels)
+    ]
+
 
 async def categorize_product_by_description(
     description: str,
@@ -34,21 +156,72 @@ async def categorize_product_by_description(
     space_names,
     style_names,
     n_spaces=3,
-    n_styles=3
+    n_styles=3,
+    description_embedding=None
 ):
-    category = get_top_k_labels(description, category_labels, category_embeddings, k=1)[0]
-    spaces = get_top_k_labels(description, space_names, space_embeddings, k=n_spaces)
-    styles = get_top_k_labels(description, style_names, style_embeddings, k=n_styles)
+    category, spaces, styles = (await categorize_descriptions(
+        [description],
+        category_embeddings,
+        space_embeddings,
+        style_embeddings,
+        space_names,
+        style_names,
+        n_spaces=n_spaces,
+        n_styles=n_styles,
+        description_embeddings=None if description_embedding is None else [description_embedding]
+    ))[0]
 
     spaces_ids = await get_ids_from_names(spaces, spaces_collection)
     styles_ids = await get_ids_from_names(styles, styles_collection)
     return category, spaces_ids, styles_ids
 
 
+async def categorize_products_by_description(
+    descriptions: List[str],
+    category_embeddings,
+    space_embeddings,
+    style_embeddings,
+    space_names,
+    style_names,
+    n_spaces=3,
+    n_styles=3,
+    description_embeddings=None
+) -> List[Tuple[str, List[str], List[str]]]:
+    results = await categorize_descriptions(
+        descriptions,
+        category_embeddings,
+        space_embeddings,
+        style_embeddings,
+        space_names,
+        style_names,
+        n_spaces=n_spaces,
+        n_styles=n_styles,
+        description_embeddings=description_embeddings
+    )
+
+    space_ids = await _get_id_map({name for _, spaces, _ in results for name in spaces}, spaces_collection)
+    style_ids = await _get_id_map({name for _, _, styles in results for name in styles}, styles_collection)
+    return [
+        (
+            category,
+            [space_ids[name] for name in spaces if name in space_ids],
+            [style_ids[name] for name in styles if name in style_ids],
+        )
+        for category, spaces, styles in results
+    ]
+
+
+async def _get_id_map(names, collection) -> Dict[str, str]:
+    if not names:
+        return {}
+    cache = cache_for(collection)
+    if cache is not None:
+        ids = await cache.name_to_id()
+        return {name: ids[name] for name in names if name in ids}
+    docs = await collection.find({"name": {"$in": list(names)}}, {"name": 1}).to_list(length=None)
+    return {doc["name"]: str(doc["_id"]) for doc in docs}
+
+
 async def get_ids_from_names(names: List[str], collection):
-    ids = []
-    for name in names:
-        doc = await collection.find_one({"name": name})
-        if doc:
-            ids.append(str(doc["_id"]))
-    return ids
+    ids = await _get_id_map(set(names), collection)
+    return [ids[name] for name in names if name in ids]
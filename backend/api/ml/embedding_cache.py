@@ -0,0 +1,59 @@
+import hashlib
+import os
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+
+class LabelEmbeddingCache:
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], cache_dir: Optional[str] = None):
+        self.encode = encode
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, labels: List[str]) -> np.ndarray:
+        keys = [self.key(label) for label in labels]
+        missing = {}
+        for key, label in zip(keys, labels):
+            if key not in self._memory and not self._load(key):
+                missing[key] = label
+
+        if missing:
+            vectors = np.asarray(self.encode(list(missing.values())))
+            for key, vector in zip(missing, vectors):
+                self._memory[key] = vector
+                self._save(key, vector)
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([self._memory[key] for key in keys])
+
+    def clear(self):
+        self._memory.clear()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load(self, key: str) -> bool:
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return False
+        try:
+            self._memory[key] = np.load(self._path(key))
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _save(self, key: str, vector: np.ndarray):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, vector)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Could not persist label embedding {key}: {e}")
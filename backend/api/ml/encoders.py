@@ -0,0 +1,35 @@
+from typing import Callable, Dict, Optional
+
+
+def load_torch_encoder(model_name: str, onnx_file: Optional[str] = None):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def load_quantized_encoder(model_name: str, onnx_file: Optional[str] = None):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_onnx_encoder(model_name: str, onnx_file: Optional[str] = None):
+    from sentence_transformers import SentenceTransformer
+    model_kwargs = {"file_name": onnx_file} if onnx_file else None
+    try:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+    except ImportError as e:
+        raise RuntimeError("The onnx encoder backend needs `pip install optimum[onnxruntime]`") from e
+
+
+ENCODER_BACKENDS: Dict[str, Callable] = {
+    "torch": load_torch_encoder,
+    "quantized": load_quantized_encoder,
+    "onnx": load_onnx_encoder,
+}
+
+
+def load_encoder(model_name: str, backend: str = "torch", onnx_file: Optional[str] = None):
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}'. Must be one of: {list(ENCODER_BACKENDS)}")
+    return ENCODER_BACKENDS[backend](model_name, onnx_file)
@@ -0,0 +1,100 @@
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        workers: int = 1,
+        max_queue: int = 256,
+        max_batch: int = 64,
+        max_wait: float = 0.005
+    ):
+        self._encode = encode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._batches = set()
+
+    async def run(self, fn: Callable, *args):
+        self._bind()
+        async with self._slots:
+            return await self._loop.run_in_executor(self._pool, fn, *args)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if len(texts) >= self.max_batch:
+            return await self.run(self._encode, texts)
+
+        self._bind()
+        future = self._loop.create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    def shutdown(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _bind(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._dispatcher is None or self._dispatcher.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.workers)
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = self._loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            await self._slots.acquire()
+            task = self._loop.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            texts = [text for item, _ in batch for text in item]
+            vectors = await self._loop.run_in_executor(self._pool, self._encode, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        start = 0
+        for item, future in batch:
+            if not future.done():
+                future.set_result(vectors[start:start + len(item)])
+            start += len(item)
@@ -0,0 +1,223 @@
+import copy
+import time
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from typing import Dict, Iterator, List, Optional, Tuple
+from backend.api.ml.ann_index import FILTER_FIELDS, filter_labels
+
+
+class ProductSimilarityIndex:
+    def __init__(self, n_features: int = 2 ** 20, compact_ratio: float = 0.25, refit_ratio: float = 0.5):
+        self.compact_ratio = compact_ratio
+        self.refit_ratio = refit_ratio
+        self.hasher = HashingVectorizer(n_features=n_features, stop_words="english", alternate_sign=False, norm=None)
+        self.transformer: Optional[TfidfTransformer] = None
+        self.matrix: Optional[csr_matrix] = None
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.built_at: Optional[float] = None
+        self.updates_since_build = 0
+        self.attributes: List[Optional[dict]] = []
+        self._pending: List[csr_matrix] = []
+        self._alive: Optional[np.ndarray] = None
+        self._dead = 0
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.rows
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_at is not None
+
+    def is_stale(self, max_age: Optional[float] = None) -> bool:
+        if not self.is_built:
+            return True
+        if max_age and time.time() - self.built_at > max_age:
+            return True
+        return len(self.rows) > 0 and self.updates_since_build > self.refit_ratio * len(self.rows)
+
+    def invalidate(self):
+        self.built_at = None
+
+    def count_vectors(self, texts: List[str]) -> csr_matrix:
+        if not texts:
+            return csr_matrix((0, self.hasher.n_features))
+        return self.hasher.transform(texts)
+
+    def build(self, ids: List[str], texts: List[str], attributes: Optional[List[dict]] = None):
+        self.build_from_counts(ids, self.count_vectors(texts), attributes)
+
+    def build_from_counts(self, ids: List[str], counts: csr_matrix, attributes: Optional[List[dict]] = None):
+        self.install(ids, *self.fit(counts), attributes)
+
+    @staticmethod
+    def fit(counts: csr_matrix) -> Tuple[Optional[TfidfTransformer], Optional[csr_matrix]]:
+        if counts.shape[0] == 0:
+            return None, None
+        transformer = TfidfTransformer().fit(counts)
+        return transformer, transformer.transform(counts).tocsr()
+
+    def install(self, ids: List[str], transformer: Optional[TfidfTransformer], matrix: Optional[csr_matrix], attributes: Optional[List[dict]] = None):
+        self.transformer = transformer
+        self.matrix = matrix
+        self.ids = list(ids) if matrix is not None else []
+        self.rows = {product_id: row for row, product_id in enumerate(self.ids)}
+        self.attributes = list(attributes) if attributes is not None and matrix is not None else [{} for _ in self.ids]
+        self._pending = []
+        self._alive = None
+        self._dead = 0
+        self._index_attributes()
+        self.updates_since_build = 0
+        self.built_at = time.time()
+
+    def upsert(self, product_id: str, text: str, attributes: Optional[dict] = None):
+        if self.transformer is None:
+            self.invalidate()
+            return
+        self.remove(product_id)
+        self.rows[product_id] = len(self.ids)
+        self.ids.append(product_id)
+        self.attributes.append({})
+        self._pending.append(self.transformer.transform(self.count_vectors([text])))
+        self._alive = None
+        self.set_attributes(product_id, attributes or {})
+        self.updates_since_build += 1
+
+    def set_attributes(self, product_id: str, attributes: dict):
+        row = self.rows.get(product_id)
+        if row is None:
+            return
+        previous = self.attributes[row]
+        for field in FILTER_FIELDS:
+            if field not in attributes:
+                continue
+            for label in filter_labels(previous, field):
+                self._postings[(field, str(label))].remove(row)
+            for label in filter_labels(attributes, field):
+                self._postings.setdefault((field, str(label)), []).append(row)
+        self.attributes[row] = {**previous, **attributes}
+        self._columns = {}
+
+    def remove(self, product_id: str):
+        row = self.rows.pop(product_id, None)
+        if row is None:
+            return
+        self.ids[row] = None
+        self.attributes[row] = {}
+        self._columns = {}
+        self._alive = None
+        self._dead += 1
+        self.updates_since_build += 1
+
+    def snapshot(self) -> "ProductSimilarityIndex":
+        self._flush()
+        snapshot = copy.copy(self)
+        snapshot.ids = list(self.ids)
+        snapshot.rows = dict(self.rows)
+        snapshot.attributes = list(self.attributes)
+        snapshot._pending = []
+        snapshot._alive = self._alive.copy()
+        snapshot._postings = {key: list(rows) for key, rows in self._postings.items()}
+        snapshot._columns = {}
+        return snapshot
+
+    def vector(self, product_id: str) -> Optional[csr_matrix]:
+        self._flush()
+        row = self.rows.get(product_id)
+        return None if row is None else self.matrix[row]
+
+    def score_rows(self, vector: csr_matrix, rows: np.ndarray) -> np.ndarray:
+        self._flush()
+        norm = np.sqrt(vector.multiply(vector).sum())
+        if len(rows) == 0 or norm == 0:
+            return np.zeros(len(rows))
+        return (self.matrix[rows] @ vector.T).toarray().ravel() / norm
+
+    def candidate_rows(self, filters: Optional[dict] = None) -> np.ndarray:
+        self._flush()
+        mask = self._alive.copy()
+        for field, values in (filters or {}).items():
+            if values is None:
+                continue
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            field_mask = np.zeros(len(self.ids), dtype=bool)
+            for value in values:
+                field_mask[self._postings.get((field, str(value)), [])] = True
+            mask &= field_mask
+        return np.flatnonzero(mask)
+
+    def column(self, field: str) -> np.ndarray:
+        self._flush()
+        if field not in self._columns:
+            self._columns[field] = np.fromiter(
+                (attributes.get(field) or 0 for attributes in self.attributes), dtype=np.float64, count=len(self.attributes)
+            )
+        return self._columns[field]
+
+    def most_similar(self, product_id: str, top_n: int = 5) -> List[Tuple[str, float]]:
+        self._flush()
+        row = self.rows.get(product_id)
+        if row is None:
+            raise KeyError(product_id)
+
+        scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+        scores[~self._alive] = -np.inf
+        scores[row] = -np.inf
+        return self._top_n(scores, top_n, self.ids, len(self.rows))
+
+    def top_k_table(self, k: int, batch_size: int = 128) -> Iterator[Tuple[str, List[Tuple[str, float]]]]:
+        self._flush()
+        matrix, alive, ids = self.matrix, self._alive, list(self.ids)
+        live_rows = np.flatnonzero(alive)
+        matrix_t = matrix.T.tocsr() if matrix is not None else None
+
+        for start in range(0, len(live_rows), batch_size):
+            batch = live_rows[start:start + batch_size]
+            scores = (matrix[batch] @ matrix_t).toarray()
+            scores[:, ~alive] = -np.inf
+            scores[np.arange(len(batch)), batch] = -np.inf
+            for i, row in enumerate(batch):
+                yield ids[row], self._top_n(scores[i], k, ids, len(live_rows))
+
+    def _top_n(self, scores: np.ndarray, top_n: int, ids: List[Optional[str]], live: int) -> List[Tuple[str, float]]:
+        n = min(top_n, live - 1)
+        if n <= 0:
+            return []
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    def _flush(self):
+        if self._pending:
+            self.matrix = vstack([self.matrix, *self._pending], format="csr")
+            self._pending = []
+        if self._dead > self.compact_ratio * max(len(self.ids), 1):
+            self._compact()
+        if self._alive is None:
+            self._alive = np.fromiter((i is not None for i in self.ids), dtype=bool, count=len(self.ids))
+
+    def _compact(self):
+        keep = [row for row, product_id in enumerate(self.ids) if product_id is not None]
+        self.matrix = self.matrix[keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.attributes = [self.attributes[row] for row in keep]
+        self.rows = {product_id: row for row, product_id in enumerate(self.ids)}
+        self._alive = None
+        self._dead = 0
+        self._index_attributes()
+
+    def _index_attributes(self):
+        self._postings = {}
+        self._columns = {}
+        for row, attributes in enumerate(self.attributes):
+            if self.ids[row] is None:
+                continue
+            for field in FILTER_FIELDS:
+                for label in filter_labels(attributes, field):
+                    self._postings.setdefault((field, str(label)), []).append(row)
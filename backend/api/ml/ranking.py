@@ -0,0 +1,58 @@
+import os
+import numpy as np
+from typing import Optional, Sequence
+
+
+def normalize_scores(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return values
+    min_v, max_v = values.min(), values.max()
+    if max_v == min_v:
+        return np.zeros_like(values)
+    return (values - min_v) / (max_v - min_v)
+
+
+def top_indices(scores: np.ndarray, offset: int, limit: int) -> np.ndarray:
+    end = min(offset + limit, len(scores))
+    if end <= offset:
+        return np.empty(0, dtype=np.int64)
+    if end < len(scores):
+        kth = -np.partition(-scores, end - 1)[end - 1]
+        above = np.flatnonzero(scores > kth)
+        top = np.concatenate((above, np.flatnonzero(scores == kth)[:end - len(above)]))
+    else:
+        top = np.arange(len(scores))
+    top = top[np.lexsort((top, -scores[top]))]
+    return top[offset:end]
+
+
+class Ranker:
+    def __init__(self, similarity_weight: float = 0.70, quality_weight: float = 0.30):
+        self.similarity_weight = similarity_weight
+        self.quality_weight = quality_weight
+
+    @classmethod
+    def from_env(cls) -> "Ranker":
+        return cls(
+            similarity_weight=float(os.getenv("RANKER_SIMILARITY_WEIGHT", 0.70)),
+            quality_weight=float(os.getenv("RANKER_QUALITY_WEIGHT", 0.30))
+        )
+
+    @staticmethod
+    def quality(products: Sequence[dict]) -> np.ndarray:
+        ratings = np.fromiter((p.get("rating") or 0 for p in products), dtype=np.float64, count=len(products))
+        review_counts = np.fromiter((p.get("review_count") or 0 for p in products), dtype=np.float64, count=len(products))
+        return Ranker.quality_scores(ratings, review_counts)
+
+    @staticmethod
+    def quality_scores(ratings: np.ndarray, review_counts: np.ndarray) -> np.ndarray:
+        return np.asarray(ratings, dtype=np.float64) * np.asarray(review_counts, dtype=np.float64)
+
+    def scores(self, quality: np.ndarray, similarity: Optional[np.ndarray] = None) -> np.ndarray:
+        if similarity is None:
+            return np.asarray(quality, dtype=np.float64)
+        return self.similarity_weight * np.asarray(similarity, dtype=np.float64) + self.quality_weight * normalize_scores(quality)
+
+    def rank(self, quality: np.ndarray, similarity: Optional[np.ndarray] = None, offset: int = 0, limit: int = 10) -> np.ndarray:
+        return top_indices(self.scores(quality, similarity), offset, limit)
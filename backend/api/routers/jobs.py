@@ -0,0 +1,37 @@
+from fastapi import APIRouter, status, HTTPException, Depends, Response, Request
+import json
+from backend.api.dependencies.auth import is_admin
+from backend.api.schemas.jobs import JobRead
+from backend.api.services import job_service
+from typing import List
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/", response_model=List[JobRead], status_code=status.HTTP_200_OK)
+async def get_jobs(request: Request, response: Response, current_user: str = Depends(is_admin)):
+    range_param = request.query_params.get('range')
+    if range_param:
+        range_values = json.loads(range_param)
+        skip = range_values[0]
+        limit = range_values[1] - range_values[0] + 1
+    else:
+        skip = 0
+        limit = 10
+
+    jobs, total = await job_service.list_jobs(skip, limit)
+    response.headers["Content-Range"] = f"0-{skip + len(jobs) - 1}/{total}"
+    return jobs
+
+@router.get("/{id}", response_model=JobRead, status_code=status.HTTP_200_OK)
+async def get_job(id: str, current_user: str = Depends(is_admin)):
+    job = await job_service.get_job(id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post("/{id}/cancel", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def cancel_job(id: str, current_user: str = Depends(is_admin)):
+    job = await job_service.cancel_job(id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
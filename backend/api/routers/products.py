@@ -2,10 +2,12 @@ from fastapi import APIRouter, status, HTTPException, Depends, UploadFile, File,
 import json
 from backend.api.dependencies.auth import is_admin
 from backend.api.services import products as products_service
+from backend.api.services import product_neighbors_service, product_import_service
 from backend.api.schemas.products import *
 from typing import List
 from backend.api.services.auth_service import get_current_user
 from backend.api.schemas.products import ProductReviewCreate, ProductReview
+from backend.api.schemas.jobs import JobRead
 from backend.api.models.users import UserDB
 
 
@@ -29,6 +31,14 @@ async def get_products(request: Request, response: Response):
     response.headers["Content-Range"] = f"0-{skip + len(products) - 1}/{total}"
     return products
 
+@router.get("/neighbors/status", status_code=status.HTTP_200_OK)
+async def get_neighbor_table_status(current_user: str = Depends(is_admin)):
+    return await product_neighbors_service.neighbor_table_status()
+
+@router.post("/neighbors/rebuild", status_code=status.HTTP_200_OK)
+async def rebuild_neighbor_table(current_user: str = Depends(is_admin)):
+    return await product_neighbors_service.rebuild_neighbor_table()
+
 @router.get("/{id}", response_model=ProductRead, status_code=status.HTTP_200_OK)
 async def get_product(id: str):
     product = await products_service.get_product(id)  
@@ -52,6 +62,10 @@ async def create_products(products_data: List[ProductCreate], current_user: str
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="All products already exist, or category not aplicable")
     return results
 
+@router.post("/bulk/jobs", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def submit_products_bulk_job(products_data: List[ProductCreate], current_user: str = Depends(is_admin), n_spaces: int = 3, n_styles: int = 3):
+    return await product_import_service.submit_bulk_job(products_data, n_spaces=n_spaces, n_styles=n_styles, submitted_by=current_user.username)
+
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
 async def delete_product(id: str, current_user: str = Depends(is_admin)):
     success = await products_service.delete_product(id)  
@@ -77,19 +91,21 @@ async def update_product(id: str, product_data: ProductUpdate, current_user: str
 
 @router.post("/import")
 async def import_products(file: UploadFile = File(...)):
-    if not file.filename.endswith(".xlsx"):
-        raise HTTPException(status_code=400, detail="Solo se aceptan archivos .xlsx")
+    if product_import_service.import_format(file.filename) is None:
+        raise HTTPException(status_code=400, detail=f"Solo se aceptan archivos {', '.join(product_import_service.IMPORT_FORMATS)}")
     try:
-        contents = await file.read()
-        result = await products_service.import_products_from_excel(contents)
-        return {
-            "inserted": result["inserted"],
-            "skipped": result["skipped"],
-            "total": result["total"]
-        }
+        return await product_import_service.import_products(file.file, file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al procesar el archivo: {str(e)}")
-    
+
+@router.post("/import/jobs", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def submit_import_job(file: UploadFile = File(...), current_user: str = Depends(is_admin)):
+    if product_import_service.import_format(file.filename) is None:
+        raise HTTPException(status_code=400, detail=f"Solo se aceptan archivos {', '.join(product_import_service.IMPORT_FORMATS)}")
+    return await product_import_service.submit_import_job(file.file, file.filename, submitted_by=current_user.username)
+
 @router.get("/{id}/recomendations", response_model=List[ProductRead], status_code=status.HTTP_200_OK)
 async def get_product_recommendations(id: str, top_n: int = 5):
     try:
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional, Type, TypeVar
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled", "interrupted"]
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    submitted_by: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+T = TypeVar("T", bound=BaseModel)
+
+def from_mongo(document: dict, model: Type[T]) -> T:
+    if not document:
+        return None
+    if "_id" in document:
+        document["id"] = str(document["_id"])
+        del document["_id"]
+    return model(**document)
@@ -1,18 +1,102 @@
+import asyncio
+import os
+import time
+from pathlib import Path
 from backend.api.services.spaces import list_spaces
 from backend.api.services.styles import list_styles
-from backend.api.ml.categorization import model, category_labels
+from backend.api.services.taxonomy_service import spaces_cache, styles_cache, TAXONOMY_CACHE_TTL
+from backend.api.ml.categorization import get_model, is_model_loaded, inference, category_labels, MODEL_NAME, ENCODER_ID, CATEGORIZATION_ENABLED
+from backend.api.ml.embedding_cache import LabelEmbeddingCache
+
+MODEL_WARM_UP = os.getenv("MODEL_WARM_UP", "true").lower() not in ("0", "false", "no")
+MODEL_WARM_UP_RETRIES = int(os.getenv("MODEL_WARM_UP_RETRIES", 3))
+MODEL_WARM_UP_BACKOFF = float(os.getenv("MODEL_WARM_UP_BACKOFF", 5))
+EMBEDDINGS_CACHE_DIR = os.getenv(
+    "EMBEDDINGS_CACHE_DIR",
+    str(Path(__file__).resolve().parent.parent / "output" / "embedding_cache")
+)
+
+label_embedding_cache = LabelEmbeddingCache(
+    lambda labels: get_model().encode(labels, convert_to_numpy=True),
+    os.path.join(EMBEDDINGS_CACHE_DIR, MODEL_NAME, ENCODER_ID)
+)
+
+_embeddings = None
+_loaded_at = 0.0
+_generation = 0
+_lock = asyncio.Lock()
+warm_up_state = {"attempts": 0, "gave_up": False, "error": None}
+
+
+def invalidate_embeddings():
+    global _embeddings, _generation
+    _embeddings = None
+    _generation += 1
+
+
+spaces_cache.on_invalidate(invalidate_embeddings)
+styles_cache.on_invalidate(invalidate_embeddings)
+
+
+def _is_fresh() -> bool:
+    return _embeddings is not None and time.time() - _loaded_at <= TAXONOMY_CACHE_TTL
+
 
 async def load_embeddings():
-    all_spaces, _ = await list_spaces(limit=1000)
+    global _embeddings, _loaded_at
+    if _is_fresh():
+        return _embeddings
+    async with _lock:
+        if _is_fresh():
+            return _embeddings
+        generation = _generation
+        embeddings = await _compute_embeddings()
+        if generation == _generation:
+            _embeddings = embeddings
+            _loaded_at = time.time()
+        return embeddings
+
+
+async def warm_up_categorization(retries: int = MODEL_WARM_UP_RETRIES, backoff: float = MODEL_WARM_UP_BACKOFF):
+    if not CATEGORIZATION_ENABLED or not MODEL_WARM_UP:
+        return
+    for attempt in range(retries + 1):
+        warm_up_state["attempts"] = attempt + 1
+        try:
+            await load_embeddings()
+            await inference.run(get_model)
+            warm_up_state["error"] = None
+            return
+        except Exception as e:
+            warm_up_state["error"] = str(e)
+            if attempt < retries:
+                print(f"Categorization warm-up failed, retrying in {backoff * 2 ** attempt:.0f}s: {e}")
+                await asyncio.sleep(backoff * 2 ** attempt)
+    warm_up_state["gave_up"] = True
+    print(f"Categorization warm-up gave up, the model will be loaded on first use: {warm_up_state['error']}")
+
+
+def categorization_status() -> dict:
+    model_loaded = is_model_loaded()
+    return {
+        "ready": not CATEGORIZATION_ENABLED or not MODEL_WARM_UP or model_loaded or warm_up_state["gave_up"],
+        "categorization_enabled": CATEGORIZATION_ENABLED,
+        "model_loaded": model_loaded,
+        "warm_up_error": None if model_loaded else warm_up_state["error"],
+    }
+
+
+async def _compute_embeddings():
+    all_spaces, _ = await list_spaces(limit=1000, fresh=True)
     space_labels = [f"{space.name.lower()} {space.description.lower()}" for space in all_spaces]
     space_names = [space.name for space in all_spaces]
 
-    all_styles, _ = await list_styles(limit=1000)
+    all_styles, _ = await list_styles(limit=1000, fresh=True)
     style_labels = [f"{style.name.lower()} {style.description.lower()}" for style in all_styles]
     style_names = [style.name for style in all_styles]
 
-    category_embeddings = model.encode(category_labels, convert_to_tensor=True)
-    space_embeddings = model.encode(space_labels, convert_to_tensor=True)
-    style_embeddings = model.encode(style_labels, convert_to_tensor=True)
+    category_embeddings = await inference.run(label_embedding_cache.get, category_labels)
+    space_embeddings = await inference.run(label_embedding_cache.get, space_labels)
+    style_embeddings = await inference.run(label_embedding_cache.get, style_labels)
 
     return category_embeddings, space_embeddings, style_embeddings, space_names, style_names
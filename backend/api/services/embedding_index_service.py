@@ -0,0 +1,121 @@
+import asyncio
+import os
+import numpy as np
+from bson import ObjectId
+from typing import Dict, List, Optional
+from backend.api.db.database import products_collection, read_collection
+from backend.api.ml.ann_index import FILTER_FIELDS, IVFIndex
+from backend.api.services import product_embeddings_service
+from backend.api.services.product_index_service import iter_catalog
+from backend.api.schemas.products import ProductRead, from_mongo
+
+EMBEDDING_INDEX_MAX_AGE = int(os.getenv("EMBEDDING_INDEX_MAX_AGE", 3600))
+EMBEDDING_INDEX_NLIST = int(os.getenv("EMBEDDING_INDEX_NLIST", 0)) or None
+EMBEDDING_INDEX_NPROBE = int(os.getenv("EMBEDDING_INDEX_NPROBE", 8))
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR")
+FILTER_PROJECTION = {field: 1 for field in FILTER_FIELDS}
+
+embedding_index = IVFIndex(nlist=EMBEDDING_INDEX_NLIST, nprobe=EMBEDDING_INDEX_NPROBE)
+_rebuild_lock = asyncio.Lock()
+_writes_during_rebuild = []
+
+
+def _filter_metadata(document: Dict) -> Dict:
+    return {field: document.get(field) for field in FILTER_FIELDS}
+
+
+async def rebuild_embedding_index() -> int:
+    async with _rebuild_lock:
+        metadata = {}
+        async for batch in iter_catalog(projection=FILTER_PROJECTION):
+            metadata.update({str(doc["_id"]): _filter_metadata(doc) for doc in batch})
+
+        ids, vectors = [], []
+        async for batch_ids, batch_vectors in product_embeddings_service.iter_embeddings():
+            keep = [i for i, product_id in enumerate(batch_ids) if product_id in metadata]
+            ids.extend(batch_ids[i] for i in keep)
+            vectors.append(batch_vectors[keep])
+
+        embedding_index.build(ids, np.concatenate(vectors) if ids else np.empty((0, 0)), [metadata[pid] for pid in ids])
+        if EMBEDDING_INDEX_DIR:
+            await asyncio.to_thread(embedding_index.save, EMBEDDING_INDEX_DIR)
+
+        while _writes_during_rebuild:
+            await _writes_during_rebuild.pop(0)()
+    print(f"Embedding index rebuilt with {len(embedding_index)} products")
+    return len(embedding_index)
+
+
+async def warm_up_embedding_index():
+    try:
+        if EMBEDDING_INDEX_DIR and os.path.exists(os.path.join(EMBEDDING_INDEX_DIR, "rows.json")):
+            embedding_index.load(EMBEDDING_INDEX_DIR, mmap=True)
+            if not embedding_index.is_stale(EMBEDDING_INDEX_MAX_AGE):
+                print(f"Embedding index loaded from {EMBEDDING_INDEX_DIR} with {len(embedding_index)} products")
+                return
+        await rebuild_embedding_index()
+    except Exception as e:
+        print(f"Embedding index warm-up failed, it will be built on first use: {e}")
+
+
+async def ensure_embedding_index():
+    if not embedding_index.is_stale(EMBEDDING_INDEX_MAX_AGE):
+        return
+    if _rebuild_lock.locked():
+        async with _rebuild_lock:
+            return
+    await rebuild_embedding_index()
+
+
+async def index_product(product: ProductRead, vector: Optional[np.ndarray] = None):
+    if _rebuild_lock.locked():
+        _writes_during_rebuild.append(lambda: _upsert(product, vector))
+        return
+    await _upsert(product, vector)
+
+
+async def unindex_product(product_id: str):
+    if _rebuild_lock.locked():
+        _writes_during_rebuild.append(lambda: _remove(product_id))
+        return
+    await _remove(product_id)
+
+
+async def _upsert(product: ProductRead, vector: Optional[np.ndarray] = None):
+    if not embedding_index.is_built:
+        return
+    product_id = str(product.id)
+    if vector is None:
+        vector = (await product_embeddings_service.get_embeddings([product_id])).get(product_id)
+    if vector is None:
+        embedding_index.remove(product_id)
+        return
+    embedding_index.upsert(product_id, vector, _filter_metadata(product.model_dump()))
+
+
+async def _remove(product_id: str):
+    embedding_index.remove(product_id)
+
+
+def invalidate_embedding_index():
+    embedding_index.invalidate()
+
+
+async def search_products(vector: np.ndarray, top_n: int, filters: Optional[Dict] = None, exclude=None) -> List[tuple]:
+    await ensure_embedding_index()
+    return embedding_index.search(vector, top_n, filters, exclude)
+
+
+async def get_similar_products(product: ProductRead, top_n: int = 5) -> List[ProductRead]:
+    await ensure_embedding_index()
+    product_id = str(product.id)
+    if product_id not in embedding_index:
+        await index_product(product)
+    if product_id not in embedding_index:
+        raise ValueError(f"Product ID {product_id} has no stored embedding.")
+
+    neighbors = embedding_index.most_similar(product_id, top_n)
+    neighbor_ids = [ObjectId(pid) for pid, _ in neighbors]
+    documents = await read_collection(products_collection).find({"_id": {"$in": neighbor_ids}}).to_list(length=len(neighbor_ids))
+    by_id = {str(doc["_id"]): doc for doc in documents}
+    return [from_mongo(by_id[pid], ProductRead) for pid, _ in neighbors if pid in by_id]
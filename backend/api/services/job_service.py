@@ -0,0 +1,172 @@
+import asyncio
+import os
+import uuid
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from typing import Awaitable, Callable, Dict, Optional
+from backend.api.db.database import jobs_collection
+from backend.api.schemas.jobs import JobRead, from_mongo
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+JOB_HEARTBEAT_INTERVAL = int(os.getenv("JOB_HEARTBEAT_INTERVAL", 30))
+ACTIVE_STATUSES = ["queued", "running"]
+WORKER_ID = uuid.uuid4().hex
+
+_slots = asyncio.Semaphore(JOB_CONCURRENCY)
+_tasks: Dict[str, asyncio.Task] = {}
+_stopping = False
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobInterrupted(Exception):
+    pass
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def submit_job(
+    kind: str,
+    work: Callable[[Callable[[Dict], Awaitable]], Awaitable[Dict]],
+    cleanup: Optional[Callable[[], None]] = None,
+    submitted_by: Optional[str] = None,
+) -> JobRead:
+    now = _now()
+    document = {
+        "_id": ObjectId(),
+        "kind": kind,
+        "status": "queued",
+        "progress": {},
+        "result": None,
+        "error": None,
+        "cancel_requested": False,
+        "submitted_by": submitted_by,
+        "worker": WORKER_ID,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "heartbeat_at": now,
+    }
+    await jobs_collection.insert_one(document)
+    job_id = str(document["_id"])
+    _tasks[job_id] = asyncio.create_task(_run(job_id, work, cleanup))
+    return from_mongo(document, JobRead)
+
+
+async def _run(job_id: str, work, cleanup):
+    try:
+        async with _slots:
+            started = await jobs_collection.update_one(
+                {"_id": ObjectId(job_id), "status": "queued", "cancel_requested": False},
+                {"$set": {"status": "running", "started_at": _now(), "heartbeat_at": _now()}},
+            )
+            if started.matched_count == 0:
+                await _finish(job_id, "cancelled")
+                return
+            result = await work(lambda progress: report_progress(job_id, progress))
+        await _finish(job_id, "succeeded", result=result)
+    except JobInterrupted:
+        await _finish(job_id, "interrupted", error="The job was marked interrupted while it was running")
+    except (asyncio.CancelledError, JobCancelled):
+        await _finish(job_id, "interrupted" if _stopping else "cancelled")
+    except Exception as e:
+        await _finish(job_id, "failed", error=str(e))
+    finally:
+        _tasks.pop(job_id, None)
+        if cleanup:
+            cleanup()
+
+
+async def _finish(job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+    try:
+        await jobs_collection.update_one(
+            {"_id": ObjectId(job_id), "$or": [
+                {"status": {"$in": ACTIVE_STATUSES}},
+                {"status": "interrupted", "worker": WORKER_ID},
+            ]},
+            {"$set": {"status": status, "result": result, "error": error, "finished_at": _now()}},
+        )
+    except Exception as e:
+        print(f"Job {job_id} could not be marked {status}: {e}")
+
+
+async def report_progress(job_id: str, progress: Dict):
+    job = await jobs_collection.find_one_and_update(
+        {"_id": ObjectId(job_id)},
+        {"$set": {"progress": progress, "heartbeat_at": _now()}},
+        projection={"cancel_requested": 1, "status": 1},
+    )
+    if job and job.get("status") == "interrupted":
+        raise JobInterrupted()
+    if job and job.get("cancel_requested"):
+        raise JobCancelled()
+
+
+async def get_job(job_id: str) -> Optional[JobRead]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    return from_mongo(await jobs_collection.find_one({"_id": ObjectId(job_id)}), JobRead)
+
+
+async def list_jobs(skip: int = 0, limit: int = 10):
+    jobs = await jobs_collection.find().sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    total = await jobs_collection.count_documents({})
+    return [from_mongo(job, JobRead) for job in jobs], total
+
+
+async def cancel_job(job_id: str) -> Optional[JobRead]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = await jobs_collection.find_one_and_update(
+        {"_id": ObjectId(job_id), "status": {"$in": ACTIVE_STATUSES}},
+        {"$set": {"cancel_requested": True}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        return await get_job(job_id)
+    task = _tasks.get(job_id)
+    if task is not None:
+        task.cancel()
+    return from_mongo(job, JobRead)
+
+
+async def recover_jobs(stale_after: int = 3 * JOB_HEARTBEAT_INTERVAL) -> int:
+    result = await jobs_collection.update_many(
+        {
+            "_id": {"$nin": [ObjectId(job_id) for job_id in _tasks]},
+            "status": {"$in": ACTIVE_STATUSES},
+            "heartbeat_at": {"$lt": _now() - timedelta(seconds=stale_after)},
+        },
+        {"$set": {"status": "interrupted", "error": "The worker running this job stopped", "finished_at": _now()}},
+    )
+    return result.modified_count
+
+
+async def monitor_jobs(interval: int = JOB_HEARTBEAT_INTERVAL):
+    while True:
+        try:
+            if _tasks:
+                await jobs_collection.update_many(
+                    {"_id": {"$in": [ObjectId(job_id) for job_id in _tasks]}},
+                    {"$set": {"heartbeat_at": _now()}},
+                )
+            interrupted = await recover_jobs(3 * interval)
+            if interrupted:
+                print(f"Marked {interrupted} orphaned jobs as interrupted")
+        except Exception as e:
+            print(f"Job monitor failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def shutdown():
+    global _stopping
+    _stopping = True
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
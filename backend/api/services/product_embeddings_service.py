@@ -0,0 +1,120 @@
+import hashlib
+import numpy as np
+from bson import Binary
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Tuple
+from pymongo import ReplaceOne
+from backend.api.db.database import product_embeddings_collection, products_collection
+from backend.api.ml.categorization import MODEL_NAME, ENCODER_ID, CATEGORIZATION_ENABLED, encode
+
+ENCODER_KEY = f"{MODEL_NAME}/{ENCODER_ID}"
+EMBEDDINGS_BATCH_SIZE = 1000
+
+
+def description_hash(description: str) -> str:
+    return hashlib.sha256((description or "").encode("utf-8")).hexdigest()
+
+
+def to_binary(vector: np.ndarray) -> Binary:
+    return Binary(np.asarray(vector, dtype=np.float16).tobytes())
+
+
+def from_binary(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+
+
+async def save_embeddings(product_ids: List[str], descriptions: List[str], vectors: np.ndarray):
+    if not product_ids:
+        return
+    now = datetime.now(timezone.utc)
+    operations = [
+        ReplaceOne(
+            {"_id": product_id},
+            {
+                "_id": product_id,
+                "vector": to_binary(vector),
+                "dim": int(len(vector)),
+                "encoder": ENCODER_KEY,
+                "description_hash": description_hash(description),
+                "updated_at": now,
+            },
+            upsert=True
+        )
+        for product_id, description, vector in zip(product_ids, descriptions, vectors)
+    ]
+    for start in range(0, len(operations), EMBEDDINGS_BATCH_SIZE):
+        await product_embeddings_collection.bulk_write(operations[start:start + EMBEDDINGS_BATCH_SIZE], ordered=False)
+
+
+async def embed_products(product_ids: List[str], descriptions: List[str]):
+    if not CATEGORIZATION_ENABLED:
+        await product_embeddings_collection.delete_many({"_id": {"$in": product_ids}})
+        return
+    await save_embeddings(product_ids, descriptions, await encode(descriptions))
+
+
+async def refresh_embedding(product_id: str, description: str):
+    stored = await product_embeddings_collection.find_one({"_id": product_id}, {"description_hash": 1, "encoder": 1})
+    if stored and stored.get("description_hash") == description_hash(description) and stored.get("encoder") == ENCODER_KEY:
+        return
+    await embed_products([product_id], [description])
+
+
+async def get_embeddings(product_ids: List[str]) -> Dict[str, np.ndarray]:
+    documents = await product_embeddings_collection.find(
+        {"_id": {"$in": list(product_ids)}, "encoder": ENCODER_KEY},
+        {"vector": 1}
+    ).to_list(length=None)
+    return {doc["_id"]: from_binary(doc["vector"]) for doc in documents}
+
+
+async def iter_embeddings(batch_size: int = EMBEDDINGS_BATCH_SIZE) -> AsyncIterator[Tuple[List[str], np.ndarray]]:
+    cursor = product_embeddings_collection.find({"encoder": ENCODER_KEY}, {"vector": 1}).batch_size(batch_size)
+    ids, vectors = [], []
+    async for document in cursor:
+        ids.append(document["_id"])
+        vectors.append(from_binary(document["vector"]))
+        if len(ids) >= batch_size:
+            yield ids, np.stack(vectors)
+            ids, vectors = [], []
+    if ids:
+        yield ids, np.stack(vectors)
+
+
+async def delete_embeddings(product_ids: List[str] = None):
+    if product_ids is None:
+        await product_embeddings_collection.delete_many({})
+    else:
+        await product_embeddings_collection.delete_many({"_id": {"$in": list(product_ids)}})
+
+
+async def backfill_embeddings(batch_size: int = EMBEDDINGS_BATCH_SIZE) -> int:
+    encoded = 0
+    cursor = products_collection.find({}, {"description": 1}).batch_size(batch_size)
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            encoded += await _backfill_batch(batch)
+            batch = []
+    if batch:
+        encoded += await _backfill_batch(batch)
+    return encoded
+
+
+async def _backfill_batch(documents: List[dict]) -> int:
+    ids = [str(doc["_id"]) for doc in documents]
+    stored = await product_embeddings_collection.find(
+        {"_id": {"$in": ids}}, {"description_hash": 1, "encoder": 1}
+    ).to_list(length=None)
+    current = {doc["_id"] for doc in stored if doc.get("encoder") == ENCODER_KEY}
+    hashes = {doc["_id"]: doc.get("description_hash") for doc in stored}
+
+    missing = [
+        (product_id, doc.get("description", ""))
+        for product_id, doc in zip(ids, documents)
+        if product_id not in current or hashes.get(product_id) != description_hash(doc.get("description", ""))
+    ]
+    if missing:
+        await embed_products([pid for pid, _ in missing], [description for _, description in missing])
+    return len(missing)
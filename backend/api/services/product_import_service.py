@@ -0,0 +1,178 @@
+import asyncio
+import csv
+import io
+import os
+import shutil
+import tempfile
+from typing import Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional
+from backend.api.services import products as products_service, job_service
+from backend.api.schemas.jobs import JobRead
+from backend.api.schemas.products import ProductCreate
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", 2))
+IMPORT_FORMATS = (".xlsx", ".csv")
+IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR") or tempfile.gettempdir()
+
+
+def import_format(filename: str) -> Optional[str]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if extension in IMPORT_FORMATS else None
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _records(header: List, rows: Iterator) -> Iterator[Dict]:
+    columns = [str(column).strip() if column is not None else None for column in header]
+    for values in rows:
+        record = {column: _clean(value) for column, value in zip(columns, values) if column}
+        if any(value is not None for value in record.values()):
+            yield record
+
+
+def iter_xlsx_rows(file: BinaryIO) -> Iterator[Dict]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header:
+            yield from _records(header, rows)
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(file: BinaryIO) -> Iterator[Dict]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        rows = csv.reader(text)
+        header = next(rows, None)
+        if header:
+            yield from _records(header, rows)
+    finally:
+        text.detach()
+
+
+READERS = {".xlsx": iter_xlsx_rows, ".csv": iter_csv_rows}
+
+
+def iter_chunks(rows: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _print_progress(progress: Dict):
+    print(f"Import chunk {progress['chunk']}: inserted {progress['inserted']}, skipped {progress['skipped']}, "
+          f"{progress['rows_processed']} rows processed")
+
+
+async def import_products(
+    file: BinaryIO,
+    filename: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    concurrency: int = IMPORT_CONCURRENCY,
+    on_progress: Callable[[Dict], Awaitable] = _print_progress,
+) -> Dict:
+    extension = import_format(filename)
+    if extension is None:
+        raise ValueError(f"Unsupported file type. Must be one of: {list(IMPORT_FORMATS)}")
+
+    chunks = iter_chunks(READERS[extension](file), chunk_size)
+    summary = {"inserted": 0, "skipped": 0, "total": 0, "chunks": 0, "failed_chunks": []}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(number: int, rows: List[Dict]):
+        try:
+            result = await products_service.import_product_rows(rows)
+        except Exception as e:
+            summary["failed_chunks"].append({"chunk": number, "rows": len(rows), "error": str(e)})
+            result = {"inserted": 0, "skipped": len(rows)}
+        finally:
+            slots.release()
+        summary["inserted"] += result["inserted"]
+        summary["skipped"] += result["skipped"]
+        await on_progress({
+            "chunk": number,
+            "inserted": result["inserted"],
+            "skipped": result["skipped"],
+            "rows_processed": summary["inserted"] + summary["skipped"],
+            "rows_read": summary["total"],
+        })
+
+    tasks = []
+    try:
+        while True:
+            await slots.acquire()
+            rows = await asyncio.to_thread(next, chunks, None)
+            if rows is None:
+                slots.release()
+                break
+            summary["chunks"] += 1
+            summary["total"] += len(rows)
+            tasks.append(asyncio.create_task(run(summary["chunks"], rows)))
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    summary["failed_chunks"].sort(key=lambda failure: failure["chunk"])
+    return summary
+
+
+def _spool_upload(file: BinaryIO, extension: str) -> str:
+    descriptor, path = tempfile.mkstemp(suffix=extension, dir=IMPORT_UPLOAD_DIR)
+    with os.fdopen(descriptor, "wb") as spooled:
+        shutil.copyfileobj(file, spooled)
+    return path
+
+
+def _remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def submit_import_job(file: BinaryIO, filename: str, submitted_by: Optional[str] = None) -> JobRead:
+    extension = import_format(filename)
+    if extension is None:
+        raise ValueError(f"Unsupported file type. Must be one of: {list(IMPORT_FORMATS)}")
+    path = await asyncio.to_thread(_spool_upload, file, extension)
+
+    async def work(report_progress):
+        with open(path, "rb") as upload:
+            return await import_products(upload, filename, on_progress=report_progress)
+
+    try:
+        return await job_service.submit_job("product_import", work, cleanup=lambda: _remove_upload(path), submitted_by=submitted_by)
+    except Exception:
+        _remove_upload(path)
+        raise
+
+
+async def submit_bulk_job(products_data: List[ProductCreate], n_spaces: int = 3, n_styles: int = 3, submitted_by: Optional[str] = None) -> JobRead:
+    async def work(report_progress):
+        await report_progress({"total": len(products_data)})
+        result = await products_service.create_products(products_data, n_spaces=n_spaces, n_styles=n_styles)
+        return {
+            "created": [product.id for product in result["created"]],
+            "existing": [product.id for product in result["existing"]],
+            "skipped": result["skipped"],
+        }
+
+    return await job_service.submit_job("product_bulk", work, submitted_by=submitted_by)
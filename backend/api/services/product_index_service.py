@@ -0,0 +1,151 @@
+import asyncio
+import os
+from bson import ObjectId
+from scipy.sparse import vstack
+from typing import AsyncIterator, Dict, List
+from backend.api.db.database import products_collection, read_collection
+from backend.api.ml.ann_index import FILTER_FIELDS
+from backend.api.ml.product_index import ProductSimilarityIndex
+from backend.api.ml.recomender import CORPUS_FIELDS, build_product_corpus, product_corpus
+from backend.api.services.taxonomy_service import spaces_cache, styles_cache
+from backend.api.schemas.products import ProductRead, from_mongo
+
+PRODUCT_INDEX_MAX_AGE = int(os.getenv("PRODUCT_INDEX_MAX_AGE", 3600))
+CATALOG_BATCH_SIZE = int(os.getenv("CATALOG_BATCH_SIZE", 1000))
+RANKING_FIELDS = {"rating", "review_count"}
+ATTRIBUTE_FIELDS = set(FILTER_FIELDS) | RANKING_FIELDS
+CORPUS_PROJECTION = {field: 1 for field in CORPUS_FIELDS | ATTRIBUTE_FIELDS}
+
+product_index = ProductSimilarityIndex()
+_rebuild_lock = asyncio.Lock()
+_writes_during_rebuild = []
+_background_rebuild = None
+
+
+async def iter_catalog(query: Dict = None, projection: Dict = CORPUS_PROJECTION, batch_size: int = CATALOG_BATCH_SIZE) -> AsyncIterator[List[Dict]]:
+    cursor = products_collection.find(query or {}, projection).batch_size(batch_size)
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def product_attributes(document: Dict) -> Dict:
+    return {field: document.get(field) for field in ATTRIBUTE_FIELDS}
+
+
+async def rebuild_product_index() -> int:
+    async with _rebuild_lock:
+        space_names = await spaces_cache.id_to_name()
+        style_names = await styles_cache.id_to_name()
+
+        ids, counts, attributes = [], [], []
+        async for batch in iter_catalog():
+            ids.extend(str(doc["_id"]) for doc in batch)
+            attributes.extend(product_attributes(doc) for doc in batch)
+            texts = [product_corpus(doc, space_names, style_names) for doc in batch]
+            counts.append(await asyncio.to_thread(product_index.count_vectors, texts))
+
+        transformer, matrix = await asyncio.to_thread(
+            lambda: product_index.fit(vstack(counts, format="csr") if counts else product_index.count_vectors([]))
+        )
+        product_index.install(ids, transformer, matrix, attributes)
+
+        while _writes_during_rebuild:
+            await _writes_during_rebuild.pop(0)()
+    print(f"Product index rebuilt with {len(product_index)} products")
+    return len(product_index)
+
+
+async def warm_up_product_index():
+    try:
+        await rebuild_product_index()
+    except Exception as e:
+        print(f"Product index warm-up failed, it will be built on first use: {e}")
+
+
+async def _rebuild_in_background():
+    try:
+        await rebuild_product_index()
+    except Exception as e:
+        print(f"Background product index rebuild failed: {e}")
+
+
+def schedule_rebuild():
+    global _background_rebuild
+    if _rebuild_lock.locked() or (_background_rebuild is not None and not _background_rebuild.done()):
+        return
+    _background_rebuild = asyncio.create_task(_rebuild_in_background())
+
+
+async def ensure_product_index():
+    if not product_index.is_stale(PRODUCT_INDEX_MAX_AGE):
+        return
+    if product_index.is_built:
+        schedule_rebuild()
+        return
+    if _rebuild_lock.locked():
+        async with _rebuild_lock:
+            return
+    await rebuild_product_index()
+
+
+async def index_product(product: ProductRead):
+    if _rebuild_lock.locked():
+        _writes_during_rebuild.append(lambda: _upsert(product))
+        return
+    await _upsert(product)
+
+
+async def unindex_product(product_id: str):
+    if _rebuild_lock.locked():
+        _writes_during_rebuild.append(lambda: _remove(product_id))
+        return
+    await _remove(product_id)
+
+
+async def _upsert(product: ProductRead):
+    if product_index.is_built:
+        product_index.upsert(str(product.id), await build_product_corpus(product), product_attributes(product.model_dump()))
+
+
+async def update_product_attributes(product: ProductRead):
+    if _rebuild_lock.locked():
+        _writes_during_rebuild.append(lambda: _set_attributes(product))
+        return
+    await _set_attributes(product)
+
+
+async def _set_attributes(product: ProductRead):
+    product_index.set_attributes(str(product.id), product_attributes(product.model_dump()))
+
+
+async def _remove(product_id: str):
+    product_index.remove(product_id)
+
+
+def invalidate_product_index():
+    product_index.invalidate()
+
+
+async def get_similar_products(product: ProductRead, top_n: int = 5) -> List[ProductRead]:
+    await ensure_product_index()
+    product_id = str(product.id)
+    if product_id not in product_index:
+        if _rebuild_lock.locked():
+            async with _rebuild_lock:
+                pass
+        if product_id not in product_index:
+            await index_product(product)
+    if product_id not in product_index:
+        raise ValueError(f"Product ID {product_id} not found in the product list.")
+
+    neighbors = product_index.most_similar(product_id, top_n)
+    neighbor_ids = [ObjectId(pid) for pid, _ in neighbors]
+    documents = await read_collection(products_collection).find({"_id": {"$in": neighbor_ids}}).to_list(length=len(neighbor_ids))
+    by_id = {str(doc["_id"]): doc for doc in documents}
+    return [from_mongo(by_id[pid], ProductRead) for pid, _ in neighbors if pid in by_id]
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from pymongo import ReplaceOne
+from backend.api.db.database import product_neighbors_collection, read_collection
+from backend.api.services import similarity_service
+
+PRODUCT_NEIGHBORS_K = int(os.getenv("PRODUCT_NEIGHBORS_K", 20))
+PRODUCT_NEIGHBORS_WRITE_BATCH = 1000
+
+last_rebuild = {}
+
+
+def _neighbor_entry(product_id: str, neighbors, computed_at: datetime) -> dict:
+    return {
+        "_id": product_id,
+        "neighbors": [pid for pid, _ in neighbors],
+        "scores": [round(score, 6) for _, score in neighbors],
+        "k": PRODUCT_NEIGHBORS_K,
+        "computed_at": computed_at,
+        "stale": False,
+    }
+
+
+async def rebuild_neighbor_table() -> dict:
+    started = time.perf_counter()
+    computed_at = datetime.now(timezone.utc)
+
+    await similarity_service.rebuild_similarity_index()
+    index_seconds = time.perf_counter() - started
+
+    snapshot = similarity_service.similarity_index().snapshot()
+    table = await asyncio.to_thread(lambda: list(snapshot.top_k_table(PRODUCT_NEIGHBORS_K)))
+
+    written = 0
+    operations = []
+    for product_id, neighbors in table:
+        entry = _neighbor_entry(product_id, neighbors, computed_at)
+        operations.append(ReplaceOne({"_id": product_id}, entry, upsert=True))
+        if len(operations) >= PRODUCT_NEIGHBORS_WRITE_BATCH:
+            await product_neighbors_collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        await product_neighbors_collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    await product_neighbors_collection.delete_many({"computed_at": {"$lt": computed_at}})
+
+    last_rebuild.update({
+        "products": written,
+        "k": PRODUCT_NEIGHBORS_K,
+        "index_seconds": round(index_seconds, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "finished_at": datetime.now(timezone.utc),
+    })
+    print(f"Neighbor table rebuilt for {written} products in {last_rebuild['total_seconds']}s")
+    return dict(last_rebuild)
+
+
+async def get_neighbor_ids(product_id: str, top_n: int) -> Optional[List[str]]:
+    if top_n > PRODUCT_NEIGHBORS_K:
+        return None
+    entry = await read_collection(product_neighbors_collection).find_one({"_id": product_id})
+    if not entry or entry.get("stale"):
+        return None
+    return entry["neighbors"][:top_n]
+
+
+async def refresh_product_neighbors(product_id: str, propagate: bool = True):
+    index = similarity_service.similarity_index()
+    if not index.is_built or product_id not in index:
+        return
+    neighbors = index.most_similar(product_id, PRODUCT_NEIGHBORS_K)
+    entry = _neighbor_entry(product_id, neighbors, datetime.now(timezone.utc))
+    await product_neighbors_collection.replace_one({"_id": product_id}, entry, upsert=True)
+    if not propagate:
+        return
+
+    neighbor_ids = [pid for pid, _ in neighbors]
+    await product_neighbors_collection.update_many(
+        {"$or": [{"neighbors": product_id}, {"_id": {"$in": neighbor_ids}}], "_id": {"$ne": product_id}},
+        {"$set": {"stale": True}}
+    )
+
+
+async def remove_product_neighbors(product_id: str):
+    await product_neighbors_collection.delete_one({"_id": product_id})
+    await product_neighbors_collection.update_many({"neighbors": product_id}, {"$set": {"stale": True}})
+
+
+async def neighbor_table_status() -> dict:
+    now = datetime.now(timezone.utc)
+    entries = await product_neighbors_collection.count_documents({})
+    stale = await product_neighbors_collection.count_documents({"stale": True})
+    oldest = await product_neighbors_collection.find_one({}, sort=[("computed_at", 1)], projection={"computed_at": 1})
+    newest = await product_neighbors_collection.find_one({}, sort=[("computed_at", -1)], projection={"computed_at": 1})
+
+    def age(entry):
+        if not entry:
+            return None
+        computed_at = entry["computed_at"]
+        if computed_at.tzinfo is None:
+            computed_at = computed_at.replace(tzinfo=timezone.utc)
+        return round((now - computed_at).total_seconds(), 3)
+
+    return {
+        "entries": entries,
+        "stale_entries": stale,
+        "k": PRODUCT_NEIGHBORS_K,
+        "oldest_entry_age_seconds": age(oldest),
+        "newest_entry_age_seconds": age(newest),
+        "last_rebuild": dict(last_rebuild) or None,
+    }
@@ -1,27 +1,35 @@
 from backend.api.schemas.products import *
 from backend.api.models.products import ProductDB
-from backend.api.db.database import products_collection, users_collection
+from backend.api.db.database import products_collection, users_collection, read_collection
 from bson import ObjectId
-import pandas as pd
-from io import BytesIO
 from pydantic import ValidationError
-from backend.api.ml.categorization import categorize_product_by_description, category_labels
-from backend.api.ml.recomender import recommend_by_cosine_similarity
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from backend.api.ml.categorization import categorize_product_by_description, categorize_products_by_description, category_labels, encode, CATEGORIZATION_ENABLED
+from backend.api.services import product_index_service, product_neighbors_service, product_embeddings_service, embedding_index_service, similarity_service, ranking_cache_service
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, Iterable, List, Set
 from backend.api.services.categorization_service import load_embeddings
+from backend.api.services.taxonomy_service import cache_for
 import ast
+import os
 from backend.api.db.database import spaces_collection, styles_collection
 
+INDEXED_FIELDS = {"name", "description", "category", "spaces", "styles"}
+RANKED_FIELDS = {"category", "spaces", "styles", "rating", "review_count"}
+SCORING_PROJECTION = {"name": 1, "description": 1, "category": 1, "rating": 1, "review_count": 1}
+REVIEW_FIELDS = {"reviews", "rating", "review_count"}
+DUPLICATE_CHECK_CHUNK = int(os.getenv("DUPLICATE_CHECK_CHUNK", 1000))
+
 async def list_products(skip: int = 0, limit: int = 10):
-    products = await products_collection.find().skip(skip).limit(limit).to_list(length=limit)
-    total = await products_collection.count_documents({})
+    products = await read_collection(products_collection).find().skip(skip).limit(limit).to_list(length=limit)
+    total = await read_collection(products_collection).count_documents({})
     return [from_mongo(product, ProductRead) for product in products], total
 
-async def get_product(id: str):
+async def get_product(id: str, fresh: bool = False):
     if not ObjectId.is_valid(id):
         return None
-    product = await products_collection.find_one({"_id": ObjectId(id)})
+    product = await read_collection(products_collection, fresh).find_one({"_id": ObjectId(id)})
     return from_mongo(product, ProductRead)
 
 
@@ -29,17 +37,22 @@ async def create_product(product_data: ProductCreate, n_spaces: int = 3, n_style
     if product_data.category and product_data.category not in category_labels:
         return {"error": f"Categoría '{product_data.category}' no es válida. Debe ser una de: {category_labels}"}
     
-    category_embeddings, space_embeddings, style_embeddings, space_names, style_names = await load_embeddings()
-    category, spaces, styles = await categorize_product_by_description(
-        product_data.description,
-        category_embeddings,
-        space_embeddings,
-        style_embeddings,
-        space_names,
-        style_names,
-        n_spaces=n_spaces,
-        n_styles=n_styles
-    )
+    category, spaces, styles = None, [], []
+    description_embeddings = None
+    if CATEGORIZATION_ENABLED:
+        description_embeddings = await encode([product_data.description])
+        category_embeddings, space_embeddings, style_embeddings, space_names, style_names = await load_embeddings()
+        category, spaces, styles = await categorize_product_by_description(
+            product_data.description,
+            category_embeddings,
+            space_embeddings,
+            style_embeddings,
+            space_names,
+            style_names,
+            n_spaces=n_spaces,
+            n_styles=n_styles,
+            description_embedding=description_embeddings[0]
+        )
 
     product_data.category = category or product_data.category
 
@@ -63,40 +76,104 @@ async def create_product(product_data: ProductCreate, n_spaces: int = 3, n_style
         return None  
     product_insert_db = await products_collection.insert_one(product_data_db.to_dict())
     document = await products_collection.find_one({"_id": product_insert_db.inserted_id})
-    return from_mongo(document, ProductRead)
+    created_product = from_mongo(document, ProductRead)
+    if description_embeddings is not None:
+        await product_embeddings_service.save_embeddings([created_product.id], [created_product.description], description_embeddings)
+    await product_index_service.index_product(created_product)
+    await embedding_index_service.index_product(created_product, None if description_embeddings is None else description_embeddings[0])
+    await product_neighbors_service.refresh_product_neighbors(created_product.id)
+    ranking_cache_service.invalidate_product_rankings(created_product)
+    return created_product
+
+
+async def categorize_products(products_data: List[ProductCreate], n_spaces: int = 3, n_styles: int = 3) -> tuple:
+    results = [(None, [], [])] * len(products_data)
+    if not products_data or not CATEGORIZATION_ENABLED:
+        return results, None
+
+    description_embeddings = await encode([p.description for p in products_data])
+    pending = [i for i, p in enumerate(products_data) if not (p.category and p.spaces and p.styles)]
+    if not pending:
+        return results, description_embeddings
+
+    category_embeddings, space_embeddings, style_embeddings, space_names, style_names = await load_embeddings()
+    predictions = await categorize_products_by_description(
+        [products_data[i].description for i in pending],
+        category_embeddings,
+        space_embeddings,
+        style_embeddings,
+        space_names,
+        style_names,
+        n_spaces=n_spaces,
+        n_styles=n_styles,
+        description_embeddings=description_embeddings[pending]
+    )
+    for i, prediction in zip(pending, predictions):
+        results[i] = prediction
+    return results, description_embeddings
+
+
+async def find_existing_by_purchase_link(links: Iterable[str]) -> Dict[str, dict]:
+    unique_links = list(dict.fromkeys(links))
+    existing = {}
+    for start in range(0, len(unique_links), DUPLICATE_CHECK_CHUNK):
+        chunk = unique_links[start:start + DUPLICATE_CHECK_CHUNK]
+        documents = await products_collection.find({"purchase_link": {"$in": chunk}}).to_list(length=len(chunk))
+        existing.update({doc["purchase_link"]: doc for doc in documents})
+    return existing
+
+
+async def insert_new_products(documents: List[dict]) -> Set[int]:
+    try:
+        await products_collection.insert_many(documents, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if not errors or any(error.get("code") != 11000 for error in errors):
+            raise
+        return {error["index"] for error in errors}
 
 
 async def create_products(products_data: List[ProductCreate], n_spaces: int = 3, n_styles: int = 3):
-    category_embeddings, space_embeddings, style_embeddings, space_names, style_names = await load_embeddings()
     valid_products = []
     existing_products = []
     skipped_count = 0
 
+    candidates = []
     for product_data in products_data:
         if product_data.category and product_data.category not in category_labels:
             skipped_count += 1
             print(f"Producto '{product_data.name}' tiene categoría inválida '{product_data.category}'. Saltando...")
             continue
+        candidates.append(product_data)
+
+    existing_docs = await find_existing_by_purchase_link(str(p.purchase_link) for p in candidates)
+    categorizable, seen_links = [], set()
+    for product_data in candidates:
+        link = str(product_data.purchase_link)
+        if link in existing_docs:
+            existing_products.append(from_mongo(existing_docs[link], ProductRead))
+        elif link in seen_links:
+            skipped_count += 1
+            print(f"Producto '{product_data.name}' repite el enlace '{link}' dentro del lote. Saltando...")
+        else:
+            seen_links.add(link)
+            categorizable.append(product_data)
 
-        category, spaces, styles = await categorize_product_by_description(
-            product_data.description,
-            category_embeddings,
-            space_embeddings,
-            style_embeddings,
-            space_names,
-            style_names,
-            n_spaces=n_spaces,
-            n_styles=n_styles
-        )
+    predictions, description_embeddings = await categorize_products(categorizable, n_spaces=n_spaces, n_styles=n_styles)
+    existing_spaces = await find_existing_ids((_id for p in categorizable for _id in p.spaces or []), spaces_collection)
+    existing_styles = await find_existing_ids((_id for p in categorizable for _id in p.styles or []), styles_collection)
+
+    for product_data, (category, spaces, styles) in zip(categorizable, predictions):
         product_data.category = product_data.category or category
 
         if product_data.spaces:
-            product_data.spaces = await validate_and_filter_existing_ids(product_data.spaces, spaces_collection)
+            product_data.spaces = await validate_and_filter_existing_ids(product_data.spaces, spaces_collection, existing_spaces)
         else:
             product_data.spaces = spaces or []
 
         if product_data.styles:
-            product_data.styles = await validate_and_filter_existing_ids(product_data.styles, styles_collection)
+            product_data.styles = await validate_and_filter_existing_ids(product_data.styles, styles_collection, existing_styles)
         else:
             product_data.styles = styles or []
 
@@ -104,18 +181,26 @@ async def create_products(products_data: List[ProductCreate], n_spaces: int = 3,
         product_data.review_count = product_data.review_count or 0
         product_data.reviews = product_data.reviews or []
 
-        product_db = ProductDB(**product_data.model_dump())
-        existing_doc = await products_collection.find_one({"purchase_link": product_db.purchase_link})
-        if existing_doc:
-            existing_products.append(from_mongo(existing_doc, ProductRead))
-        else:
-            valid_products.append(product_db.to_dict())
+        valid_products.append(ProductDB(**product_data.model_dump()).to_dict())
 
     created_products = []
     if valid_products:
-        result = await products_collection.insert_many(valid_products)
-        inserted_docs = await products_collection.find({"_id": {"$in": result.inserted_ids}}).to_list(length=len(result.inserted_ids))
-        created_products = [from_mongo(doc, ProductRead) for doc in inserted_docs]
+        duplicates = await insert_new_products(valid_products)
+        if duplicates:
+            raced = await find_existing_by_purchase_link(valid_products[i]["purchase_link"] for i in sorted(duplicates))
+            existing_products.extend(from_mongo(doc, ProductRead) for doc in raced.values())
+        inserted_indices = [i for i in range(len(valid_products)) if i not in duplicates]
+        inserted_products = [valid_products[i] for i in inserted_indices]
+        if description_embeddings is not None and inserted_products:
+            await product_embeddings_service.save_embeddings(
+                [str(p["_id"]) for p in inserted_products],
+                [p["description"] for p in inserted_products],
+                description_embeddings[inserted_indices]
+            )
+        created_products = [from_mongo(doc, ProductRead) for doc in inserted_products]
+        product_index_service.invalidate_product_index()
+        embedding_index_service.invalidate_embedding_index()
+        ranking_cache_service.invalidate_rankings()
 
     return {
         "created": created_products,
@@ -129,7 +214,7 @@ async def delete_product(id: str):
     if not ObjectId.is_valid(id):
         return None
 
-    product = await get_product(id)
+    product = await get_product(id, fresh=True)
     if product:
         await products_collection.delete_one({"_id": ObjectId(id)})
 
@@ -137,18 +222,27 @@ async def delete_product(id: str):
             {},
             {"$pull": {"liked_products": id}}
         )
+        await product_index_service.unindex_product(id)
+        await embedding_index_service.unindex_product(id)
+        await product_neighbors_service.remove_product_neighbors(id)
+        await product_embeddings_service.delete_embeddings([id])
+        ranking_cache_service.invalidate_product_rankings(product)
 
         return product
     return None
 
 async def delete_all_products():
     await products_collection.delete_many({})
+    await product_embeddings_service.delete_embeddings()
+    product_index_service.invalidate_product_index()
+    embedding_index_service.invalidate_embedding_index()
+    ranking_cache_service.invalidate_rankings()
     return True
 
 async def update_product(id: str, updated_data: ProductUpdate):
     if not ObjectId.is_valid(id):
         return None
-    product = await get_product(id)
+    product = await get_product(id, fresh=True)
     if product:
         update_dict = updated_data.model_dump(exclude_unset=True)
 
@@ -166,24 +260,33 @@ async def update_product(id: str, updated_data: ProductUpdate):
             return value
 
         update_dict = {key: convert_value(value) for key, value in update_dict.items()}
-
-        await products_collection.update_one(
-            {"_id": ObjectId(id)},
-            {"$set": update_dict}
-        )
-        return await get_product(id)
+        update = {"$set": update_dict}
+        if REVIEW_FIELDS.intersection(update_dict):
+            update["$unset"] = {"rating_sum": ""}
+
+        await products_collection.update_one({"_id": ObjectId(id)}, update)
+        updated_product = await get_product(id, fresh=True)
+        if updated_product and "description" in update_dict:
+            await product_embeddings_service.refresh_embedding(id, updated_product.description)
+        if updated_product and INDEXED_FIELDS.intersection(update_dict):
+            await product_index_service.index_product(updated_product)
+            await embedding_index_service.index_product(updated_product)
+            await product_neighbors_service.refresh_product_neighbors(id)
+        elif updated_product and product_index_service.RANKING_FIELDS.intersection(update_dict):
+            await product_index_service.update_product_attributes(updated_product)
+        if updated_product and RANKED_FIELDS.intersection(update_dict):
+            ranking_cache_service.invalidate_product_rankings(product, updated_product)
+        return updated_product
     return None
 
 
-async def import_products_from_excel(file_bytes: bytes) -> dict:
-    df = pd.read_excel(BytesIO(file_bytes))
-    df = df.astype(object).where(pd.notnull(df), None)
-    products = df.to_dict(orient="records")
-    valid_products = []
+async def import_product_rows(products: List[dict]) -> dict:
+    validated_products = []
 
     total_rows = len(products)
     skipped_count = 0
 
+    parsed_products = []
     for product in products:
         for key in ["spaces", "styles", "reviews"]:
             if isinstance(product.get(key), str):
@@ -192,21 +295,44 @@ async def import_products_from_excel(file_bytes: bytes) -> dict:
                 except (ValueError, SyntaxError):
                     product[key] = []  
         try:
-            validated = ProductCreate(**product)
-            existing = await products_collection.count_documents({
-                "purchase_link": str(validated.purchase_link)
-            })
-            if existing == 0:
-                valid_products.append(validated.model_dump(mode="json"))
-            else:
-                skipped_count += 1
-                print(f"Product {product.get('name', 'unknown')} already exists, skipping.")
+            parsed_products.append(ProductCreate(**product))
         except ValidationError as e:
             skipped_count += 1
             print(f"Validation error for product {product.get('name', 'unknown')}: {e}")
 
+    existing_docs = await find_existing_by_purchase_link(str(p.purchase_link) for p in parsed_products)
+    seen_links = set()
+    for validated in parsed_products:
+        link = str(validated.purchase_link)
+        if link in existing_docs or link in seen_links:
+            skipped_count += 1
+            print(f"Product {validated.name} already exists, skipping.")
+        else:
+            seen_links.add(link)
+            validated_products.append(validated)
+
+    predictions, description_embeddings = await categorize_products(validated_products)
+    valid_products = []
+    for validated, (category, spaces, styles) in zip(validated_products, predictions):
+        validated.category = validated.category or category
+        validated.spaces = validated.spaces or spaces
+        validated.styles = validated.styles or styles
+        valid_products.append(validated.model_dump(mode="json"))
+
     if valid_products:
-        await products_collection.insert_many(valid_products)
+        duplicates = await insert_new_products(valid_products)
+        skipped_count += len(duplicates)
+        inserted_indices = [i for i in range(len(valid_products)) if i not in duplicates]
+        valid_products = [valid_products[i] for i in inserted_indices]
+        if description_embeddings is not None and valid_products:
+            await product_embeddings_service.save_embeddings(
+                [str(p["_id"]) for p in valid_products],
+                [p["description"] for p in valid_products],
+                description_embeddings[inserted_indices]
+            )
+        product_index_service.invalidate_product_index()
+        embedding_index_service.invalidate_embedding_index()
+        ranking_cache_service.invalidate_rankings()
 
     return {
         "inserted": len(valid_products),
@@ -218,14 +344,23 @@ async def get_product_recommendations(id: str, number: int = 5) -> List[ProductR
     if not ObjectId.is_valid(id):
         return None
 
+    neighbor_ids = await product_neighbors_service.get_neighbor_ids(id, number)
+    if neighbor_ids is not None:
+        ids = [ObjectId(id)] + [ObjectId(pid) for pid in neighbor_ids]
+        documents = await read_collection(products_collection).find({"_id": {"$in": ids}}).to_list(length=len(ids))
+        by_id = {str(doc["_id"]): doc for doc in documents}
+        if id in by_id:
+            return [from_mongo(by_id[pid], ProductRead) for pid in neighbor_ids if pid in by_id]
+
     product = await get_product(id)
     if not product:
         return None
 
-    products, _ = await list_products(limit=1000)
-    recommendations = await recommend_by_cosine_similarity(str(product.id), products, number)
+    recommendations = await similarity_service.get_similar_products(product, number)
+    if number <= product_neighbors_service.PRODUCT_NEIGHBORS_K:
+        await product_neighbors_service.refresh_product_neighbors(id, propagate=False)
     return recommendations
-    
+
 
 async def get_product_reviews(product_id: str) -> List[ProductReview] | None:
     product = await get_product(product_id)
@@ -236,9 +371,28 @@ async def get_product_reviews(product_id: str) -> List[ProductReview] | None:
     return [ProductReview(**review) for review in reviews]
 
 
+def _review_baseline() -> dict:
+    return {"$set": {
+        "review_count": {"$cond": [{"$eq": [{"$type": "$rating_sum"}, "missing"]}, {"$size": {"$ifNull": ["$reviews", []]}}, "$review_count"]},
+        "rating_sum": {"$ifNull": ["$rating_sum", {"$sum": {"$ifNull": ["$reviews.rating", []]}}]},
+    }}
+
+
+def _review_rating() -> dict:
+    return {"$set": {
+        "rating": {"$cond": [{"$gt": ["$review_count", 0]}, {"$round": [{"$divide": ["$rating_sum", "$review_count"]}, 2]}, 0.0]},
+        "rating_sum": {"$cond": [{"$gt": ["$review_count", 0]}, "$rating_sum", 0.0]},
+    }}
+
+
+async def _after_review_write(document: dict):
+    product = from_mongo(document, ProductRead)
+    await product_index_service.update_product_attributes(product)
+    ranking_cache_service.invalidate_product_rankings(product)
+
+
 async def add_product_review(product_id: str, review: ProductReviewCreate, user_id: str, username: str) -> ProductReview | None:
-    product = await get_product(product_id)
-    if not product:
+    if not ObjectId.is_valid(product_id):
         return None
 
     new_review = ProductReview(
@@ -250,71 +404,79 @@ async def add_product_review(product_id: str, review: ProductReviewCreate, user_
         timestamp=datetime.now(timezone.utc)
     )
 
-    updated_reviews = product.reviews or []
-    updated_reviews.append(new_review)
-
-    review_count = len(updated_reviews)
-    rating = round(sum(r.rating if isinstance(r, ProductReview) else r["rating"] for r in updated_reviews) / review_count, 2)
-
-    update_data = ProductUpdate(
-        reviews=updated_reviews,
-        review_count=review_count,
-        rating=rating
+    document = await products_collection.find_one_and_update(
+        {"_id": ObjectId(product_id)},
+        [
+            _review_baseline(),
+            {"$set": {
+                "reviews": {"$concatArrays": [{"$ifNull": ["$reviews", []]}, [{"$literal": new_review.model_dump()}]]},
+                "rating_sum": {"$add": ["$rating_sum", new_review.rating]},
+                "review_count": {"$add": ["$review_count", 1]},
+            }},
+            _review_rating(),
+        ],
+        projection={"reviews": 0},
+        return_document=ReturnDocument.AFTER,
     )
-
-    await update_product(product_id, update_data)
+    if document is None:
+        return None
+    await _after_review_write(document)
     return new_review
 
 
 async def delete_product_review(product_id: str, review_id: str, user_id: str) -> bool:
-    product = await get_product(product_id)
-    if not product:
+    if not ObjectId.is_valid(product_id):
         return False
 
-    updated_reviews = [
-        r for r in product.reviews
-        if str(r.get("id") if isinstance(r, dict) else r.id) != review_id
-    ]
-
-    if len(updated_reviews) == len(product.reviews):
+    removed = {"$filter": {"input": "$reviews", "cond": {"$eq": ["$$this.id", review_id]}}}
+    document = await products_collection.find_one_and_update(
+        {"_id": ObjectId(product_id), "reviews.id": review_id},
+        [
+            _review_baseline(),
+            {"$set": {
+                "reviews": {"$filter": {"input": "$reviews", "cond": {"$ne": ["$$this.id", review_id]}}},
+                "rating_sum": {"$subtract": ["$rating_sum", {"$sum": {"$map": {"input": removed, "in": "$$this.rating"}}}]},
+                "review_count": {"$max": [0, {"$subtract": ["$review_count", {"$size": removed}]}]},
+            }},
+            _review_rating(),
+        ],
+        projection={"reviews": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if document is None:
         return False
+    await _after_review_write(document)
+    return True
 
-    review_count = len(updated_reviews)
-    rating = round(
-        sum(r["rating"] if isinstance(r, dict) else r.rating for r in updated_reviews) / review_count, 2
-    ) if review_count > 0 else 0.0
 
-    update_data = ProductUpdate(
-        reviews=updated_reviews,
-        review_count=review_count,
-        rating=rating
-    )
+async def get_products_by_ids(ids: List[str], projection: Optional[dict] = None) -> List[dict]:
+    object_ids = [ObjectId(_id) for _id in ids if ObjectId.is_valid(_id)]
+    documents = await read_collection(products_collection).find({"_id": {"$in": object_ids}}, projection).to_list(length=len(object_ids))
+    by_id = {str(doc["_id"]): doc for doc in documents}
+    return [by_id[_id] for _id in ids if _id in by_id]
 
-    await update_product(product_id, update_data)
-    return True
 
+async def hydrate_products(ids: List[str]) -> List[ProductRead]:
+    return [from_mongo(doc, ProductRead) for doc in await get_products_by_ids(ids)]
 
-async def get_products_by_space_and_style(space: str, style: str, categories: Optional[List[str]] = None, limit: int = 1000):
-    query = {
-        "spaces": space,
-        "styles": style
-    }
-    if categories:
-        query["category"] = {"$in": categories}
 
-    products = await products_collection.find(query).to_list(length=limit)
-    return products
+def _normalize_ids(ids: Iterable[str]) -> List[str]:
+    return [str(ObjectId(_id)) for _id in ids if ObjectId.is_valid(_id)]
 
 
+async def find_existing_ids(ids: Iterable[str], collection) -> Set[str]:
+    candidates = list(dict.fromkeys(_normalize_ids(ids)))
+    if not candidates:
+        return set()
+    cache = cache_for(collection)
+    if cache is not None:
+        return set(await cache.existing_ids(candidates))
 
-async def validate_and_filter_existing_ids(ids: List[str], collection) -> List[str]:
-    valid_ids = []
-    for _id in ids:
-        if ObjectId.is_valid(_id):
-            obj_id = ObjectId(_id)
-            exists = await collection.find_one({"_id": obj_id})
-            if exists:
-                valid_ids.append(str(obj_id))
-    return valid_ids
+    documents = await collection.find({"_id": {"$in": [ObjectId(_id) for _id in candidates]}}, {"_id": 1}).to_list(length=len(candidates))
+    return {str(doc["_id"]) for doc in documents}
 
 
+async def validate_and_filter_existing_ids(ids: List[str], collection, existing: Set[str] = None) -> List[str]:
+    if existing is None:
+        existing = await find_existing_ids(ids, collection)
+    return [_id for _id in _normalize_ids(ids) if _id in existing]
@@ -0,0 +1,86 @@
+import asyncio
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.api.db.database import products_collection
+from backend.api.ml.ranking import Ranker, top_indices
+from backend.api.services.cache import LRUCache
+
+RANKING_CACHE_SIZE = int(os.getenv("RANKING_CACHE_SIZE", 1000))
+RANKING_CACHE_TTL = int(os.getenv("RANKING_CACHE_TTL", 600))
+RANKING_REFRESH_INTERVAL = int(os.getenv("RANKING_REFRESH_INTERVAL", 300))
+RANKING_PROJECTION = {"rating": 1, "review_count": 1}
+
+RankingKey = Tuple[str, str, Tuple[str, ...]]
+
+ranking_cache = LRUCache(RANKING_CACHE_SIZE, RANKING_CACHE_TTL)
+_inflight: Dict[RankingKey, asyncio.Future] = {}
+
+
+def ranking_key(space_id: str, style_id: str, categories: Optional[List[str]] = None) -> RankingKey:
+    return space_id, style_id, tuple(sorted(set(categories or [])))
+
+
+async def compute_ranking(key: RankingKey) -> List[str]:
+    space_id, style_id, categories = key
+    query = {"spaces": space_id, "styles": style_id}
+    if categories:
+        query["category"] = {"$in": list(categories)}
+
+    documents = await products_collection.find(query, RANKING_PROJECTION).to_list(length=None)
+    quality = Ranker.quality(documents)
+    order = top_indices(quality, 0, len(documents))
+    return [str(documents[i]["_id"]) for i in order]
+
+
+async def get_ranked_ids(space_id: str, style_id: str, categories: Optional[List[str]] = None) -> List[str]:
+    key = ranking_key(space_id, style_id, categories)
+    ranked = ranking_cache.get(key)
+    if ranked is not None:
+        return ranked
+
+    if key in _inflight:
+        return await asyncio.shield(_inflight[key])
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        ranked = await compute_ranking(key)
+        ranking_cache.put(key, ranked)
+        future.set_result(ranked)
+        return ranked
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def invalidate_rankings(spaces: Optional[Iterable[str]] = None, styles: Optional[Iterable[str]] = None):
+    if spaces is None or styles is None:
+        ranking_cache.clear()
+        return
+    spaces, styles = set(spaces), set(styles)
+    for key in ranking_cache.keys():
+        if key[0] in spaces and key[1] in styles:
+            ranking_cache.pop(key)
+
+
+def invalidate_product_rankings(*products):
+    spaces = {space for product in products if product for space in product.spaces or []}
+    styles = {style for product in products if product for style in product.styles or []}
+    invalidate_rankings(spaces, styles)
+
+
+async def refresh_rankings():
+    for key in ranking_cache.keys():
+        ranking_cache.put(key, await compute_ranking(key))
+
+
+async def refresh_rankings_periodically(interval: int = RANKING_REFRESH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_rankings()
+        except Exception as e:
+            print(f"Ranking cache refresh failed: {e}")
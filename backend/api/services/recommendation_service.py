@@ -1,91 +1,71 @@
-
+import os
 from typing import Optional, List
 from fastapi import HTTPException
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 from backend.api.models.users import UserDB
 from backend.api.schemas.products import ProductRead
-from backend.api.services import user_history as user_history_service
 from backend.api.services import products as products_service
-from backend.api.ml.recomender import vectorize_products
-from backend.api.db.database import spaces_collection, styles_collection
+from backend.api.services import embedding_index_service, ranking_cache_service, similarity_service, user_profile_service
+from backend.api.ml.ranking import Ranker
+from backend.api.services.taxonomy_service import spaces_cache, styles_cache
+
+PERSONALIZED_CANDIDATES = int(os.getenv("PERSONALIZED_CANDIDATES", 500))
+
+ranker = Ranker.from_env()
 
 
 async def get_personalized(space: str, style: str, user: Optional[UserDB], limit: int = 10, offset: int = 0, category_list: Optional[List[str]] = None) -> List[ProductRead]:
     if not space or not style:
         raise HTTPException(status_code=400, detail="Space and style parameters are required")
 
-    space_doc = await spaces_collection.find_one({"name": space})
-    style_doc = await styles_collection.find_one({"name": style})
+    space_id = (await spaces_cache.name_to_id()).get(space)
+    style_id = (await styles_cache.name_to_id()).get(style)
 
-    if not space_doc or not style_doc:
+    if not space_id or not style_id:
         raise HTTPException(status_code=404, detail="Space or style not found")
 
-    space_id = str(space_doc["_id"])
-    style_id = str(style_doc["_id"])
-
     if user is None:
         return await get_top_products(space_id, style_id, limit, offset, category_list)
 
-    user_history = await user_history_service.get_user_history(str(user._id))
+    user_vector, profile = await user_profile_service.get_profile_vector(str(user._id))
 
-    if not user_history:
+    if not profile.weights:
         return await get_top_products(space_id, style_id, limit, offset, category_list)
 
-    liked_product_ids = [h.product_id for h in user_history]
-    liked_products = [await products_service.get_product(pid) for pid in liked_product_ids]
-    liked_products = [p for p in liked_products if p is not None]
-
-    if not liked_products:
+    if user_vector is None:
         raise HTTPException(status_code=404, detail="No valid liked products found")
 
-    liked_dicts = [p.model_dump() for p in liked_products]
-    liked_matrix, vectorizer = vectorize_products(liked_dicts)
-    user_vector = np.asarray(liked_matrix.mean(axis=0)).reshape(1, -1)
+    if similarity_service.uses_embeddings():
+        return await get_personalized_by_embeddings(space_id, style_id, user_vector, limit, offset, category_list)
 
-    filtered_products = await products_service.get_products_by_space_and_style(space_id, style_id, category_list)
-    if not filtered_products:
+    index = similarity_service.similarity_index()
+    rows = index.candidate_rows({"spaces": space_id, "styles": style_id, "category": category_list or None})
+    if not len(rows):
         raise HTTPException(status_code=404, detail="No products found for selected space and style")
 
-    filtered_texts = [
-        f"{p['name']} {p['description']} {p.get('category', '')}".lower()
-        for p in filtered_products
-    ]
-    filtered_matrix = vectorizer.transform(filtered_texts)
-
-    similarity_scores = cosine_similarity(user_vector, filtered_matrix).flatten()
-    quality_scores = [p.get("rating", 0) * p.get("review_count", 0) for p in filtered_products]
-    quality_scores_normalized = normalize_scores(quality_scores)
+    quality = ranker.quality_scores(index.column("rating")[rows], index.column("review_count")[rows])
+    top = ranker.rank(quality, index.score_rows(user_vector, rows), offset, limit)
+    return await products_service.hydrate_products([index.ids[rows[i]] for i in top])
 
 
-    alpha, beta = 0.70, 0.30
-    final_scores = [
-        alpha * sim + beta * qual
-        for sim, qual in zip(similarity_scores, quality_scores_normalized)
-    ]
+async def get_personalized_by_embeddings(space: str, style: str, user_vector: np.ndarray, limit: int, offset: int = 0, categories: Optional[List[str]] = None) -> List[ProductRead]:
+    filters = {"spaces": space, "styles": style, "category": categories or None}
+    pool = max(PERSONALIZED_CANDIDATES, offset + limit)
+    neighbors = await embedding_index_service.search_products(user_vector, pool, filters)
+    if not neighbors:
+        raise HTTPException(status_code=404, detail="No products found for selected space and style")
 
-    sorted_products = [
-        p for _, p in sorted(zip(final_scores, filtered_products), key=lambda pair: pair[0], reverse=True)
-    ]
+    candidates = await products_service.get_products_by_ids([pid for pid, _ in neighbors], products_service.SCORING_PROJECTION)
+    similarity = dict(neighbors)
+    similarity_scores = np.array([similarity[str(p["_id"])] for p in candidates])
 
-    paginated = sorted_products[offset:offset + limit]
-    return [products_service.from_mongo(p, ProductRead) for p in paginated]
+    top = ranker.rank(ranker.quality(candidates), similarity_scores, offset, limit)
+    return await products_service.hydrate_products([str(candidates[i]["_id"]) for i in top])
 
 
 async def get_top_products(space: str, style: str, limit: int, offset: int = 0, categories: Optional[List[str]] = None) -> List[ProductRead]:
-    filtered_products = await products_service.get_products_by_space_and_style(space, style, categories)
-    if not filtered_products:
+    ranked_ids = await ranking_cache_service.get_ranked_ids(space, style, categories)
+    if not ranked_ids:
         raise HTTPException(status_code=404, detail="No products found for selected space and style")
-
-    def quality_score(p):
-        return p.get("rating", 0) * p.get("review_count", 0)
-
-    sorted_products = sorted(filtered_products, key=quality_score, reverse=True)
-    paginated = sorted_products[offset:offset + limit]
-    return [products_service.from_mongo(p, ProductRead) for p in paginated]
-
-def normalize_scores(values):
-    min_v, max_v = min(values), max(values)
-    return [(v - min_v) / (max_v - min_v) if max_v != min_v else 0 for v in values]
-
+    return await products_service.hydrate_products(ranked_ids[offset:offset + limit])
@@ -0,0 +1,46 @@
+import os
+from typing import List
+from backend.api.services import embedding_index_service, product_index_service
+from backend.api.schemas.products import ProductRead
+
+SIMILARITY_BACKENDS = ("tfidf", "embeddings")
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "tfidf").lower()
+
+if SIMILARITY_BACKEND not in SIMILARITY_BACKENDS:
+    raise ValueError(f"Unknown similarity backend '{SIMILARITY_BACKEND}'. Must be one of: {list(SIMILARITY_BACKENDS)}")
+
+
+def uses_embeddings() -> bool:
+    return SIMILARITY_BACKEND == "embeddings"
+
+
+def similarity_index():
+    if uses_embeddings():
+        return embedding_index_service.embedding_index
+    return product_index_service.product_index
+
+
+async def rebuild_similarity_index() -> int:
+    if uses_embeddings():
+        return await embedding_index_service.rebuild_embedding_index()
+    return await product_index_service.rebuild_product_index()
+
+
+async def ensure_similarity_index():
+    if uses_embeddings():
+        await embedding_index_service.ensure_embedding_index()
+    else:
+        await product_index_service.ensure_product_index()
+
+
+async def warm_up_similarity_index():
+    if uses_embeddings():
+        await embedding_index_service.warm_up_embedding_index()
+    else:
+        await product_index_service.warm_up_product_index()
+
+
+async def get_similar_products(product: ProductRead, top_n: int = 5) -> List[ProductRead]:
+    if uses_embeddings():
+        return await embedding_index_service.get_similar_products(product, top_n)
+    return await product_index_service.get_similar_products(product, top_n)
@@ -1,18 +1,19 @@
 from backend.api.schemas.spaces import *
 from backend.api.models.spaces import SpaceDB
-from backend.api.db.database import spaces_collection, products_collection
+from backend.api.db.database import spaces_collection, products_collection, read_collection
 from bson import ObjectId
 from typing import List
+from backend.api.services.taxonomy_service import spaces_cache
 
-async def list_spaces(skip: int = 0, limit: int = 10):
-    spaces = await spaces_collection.find().skip(skip).limit(limit).to_list(length=limit)
-    total = await spaces_collection.count_documents({})
+async def list_spaces(skip: int = 0, limit: int = 10, fresh: bool = False):
+    spaces = await read_collection(spaces_collection, fresh).find().skip(skip).limit(limit).to_list(length=limit)
+    total = await read_collection(spaces_collection, fresh).count_documents({})
     return [from_mongo(space, SpaceRead) for space in spaces], total
 
-async def get_space(id: str):
+async def get_space(id: str, fresh: bool = False):
     if not ObjectId.is_valid(id):
         return None
-    space = await spaces_collection.find_one({"_id": ObjectId(id)})
+    space = await read_collection(spaces_collection, fresh).find_one({"_id": ObjectId(id)})
     return from_mongo(space, SpaceRead)
     
 
@@ -22,6 +23,7 @@ async def create_space(space_data: SpaceCreate):
     if existing_spaces > 0:
         return None  
     space_insert_db = await spaces_collection.insert_one(space_data_db.to_dict())
+    spaces_cache.invalidate()
     document = await spaces_collection.find_one({"_id": space_insert_db.inserted_id})
     return from_mongo(document, SpaceRead)
 
@@ -36,6 +38,7 @@ async def create_spaces(spaces_data: List[SpaceCreate]):
 
     if new_spaces:
         insert_result = await spaces_collection.insert_many([space.to_dict() for space in new_spaces])
+        spaces_cache.invalidate()
         created_docs = await spaces_collection.find({"_id": {"$in": insert_result.inserted_ids}}).to_list(length=len(insert_result.inserted_ids))
         created_spaces = [from_mongo(doc, SpaceRead) for doc in created_docs]
     else:
@@ -53,9 +56,10 @@ async def create_spaces(spaces_data: List[SpaceCreate]):
 async def delete_space(id: str):
     if not ObjectId.is_valid(id):
         return None
-    space = await get_space(id)
+    space = await get_space(id, fresh=True)
     if space:
         await spaces_collection.delete_one({"_id": ObjectId(id)})
+        spaces_cache.invalidate()
 
         await products_collection.update_many(
             {},
@@ -68,7 +72,7 @@ async def delete_space(id: str):
 async def update_space(id: str, updated_data: SpaceUpdate):
     if not ObjectId.is_valid(id):
         return None
-    space = await get_space(id)
+    space = await get_space(id, fresh=True)
     if space:
 
         update_dict = updated_data.model_dump(exclude_unset=True)
@@ -81,5 +85,6 @@ async def update_space(id: str, updated_data: SpaceUpdate):
         update_dict = {key: convert_value(value) for key, value in update_dict.items()}
 
         await spaces_collection.update_one({"_id": ObjectId(id)}, {"$set": update_dict})
-        return await get_space(id)
+        spaces_cache.invalidate()
+        return await get_space(id, fresh=True)
     return None
\ No newline at end of file
@@ -1,18 +1,19 @@
 from backend.api.schemas.styles import *
 from backend.api.models.styles import StyleDB
-from backend.api.db.database import styles_collection, products_collection
+from backend.api.db.database import styles_collection, products_collection, read_collection
 from bson import ObjectId
 from typing import List
+from backend.api.services.taxonomy_service import styles_cache
 
-async def list_styles(skip: int = 0, limit: int = 10):
-    styles = await styles_collection.find().skip(skip).limit(limit).to_list(length=limit)
-    total = await styles_collection.count_documents({})
+async def list_styles(skip: int = 0, limit: int = 10, fresh: bool = False):
+    styles = await read_collection(styles_collection, fresh).find().skip(skip).limit(limit).to_list(length=limit)
+    total = await read_collection(styles_collection, fresh).count_documents({})
     return [from_mongo(style, StyleRead) for style in styles], total
 
-async def get_style(id: str):
+async def get_style(id: str, fresh: bool = False):
     if not ObjectId.is_valid(id):
         return None
-    style = await styles_collection.find_one({"_id": ObjectId(id)})
+    style = await read_collection(styles_collection, fresh).find_one({"_id": ObjectId(id)})
     return from_mongo(style, StyleRead)
     
 
@@ -22,6 +23,7 @@ async def create_style(style_data: StyleCreate):
     if existing_styles > 0:
         return None  
     style_insert_db = await styles_collection.insert_one(style_data_db.to_dict())
+    styles_cache.invalidate()
     document = await styles_collection.find_one({"_id": style_insert_db.inserted_id})
     return from_mongo(document, StyleRead)
 
@@ -36,6 +38,7 @@ async def create_styles(styles_data: List[StyleCreate]):
 
     if new_styles:
         insert_result = await styles_collection.insert_many([style.to_dict() for style in new_styles])
+        styles_cache.invalidate()
         created_docs = await styles_collection.find({"_id": {"$in": insert_result.inserted_ids}}).to_list(length=len(insert_result.inserted_ids))
         created_styles = [from_mongo(doc, StyleRead) for doc in created_docs]
     else:
@@ -52,9 +55,10 @@ async def create_styles(styles_data: List[StyleCreate]):
 async def delete_style(id: str):
     if not ObjectId.is_valid(id):
         return None
-    style = await get_style(id)
+    style = await get_style(id, fresh=True)
     if style:
         await styles_collection.delete_one({"_id": ObjectId(id)})
+        styles_cache.invalidate()
 
         await products_collection.update_many(
             {},
@@ -67,7 +71,7 @@ async def delete_style(id: str):
 async def update_style(id: str, updated_data: StyleUpdate):
     if not ObjectId.is_valid(id):
         return None
-    style = await get_style(id)
+    style = await get_style(id, fresh=True)
     if style:
 
         updated_dict = updated_data.model_dump(exclude_unset=True)
@@ -80,6 +84,7 @@ async def update_style(id: str, updated_data: StyleUpdate):
         updated_dict = {key: convert_value(value) for key, value in updated_dict.items()}
 
         await styles_collection.update_one({"_id": ObjectId(id)}, {"$set": updated_dict})
+        styles_cache.invalidate()
 
-        return await get_style(id)
+        return await get_style(id, fresh=True)
     return None
\ No newline at end of file
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional
+from backend.api.db.database import spaces_collection, styles_collection
+
+TAXONOMY_CACHE_TTL = int(os.getenv("TAXONOMY_CACHE_TTL", 300))
+
+
+class TaxonomyCache:
+    def __init__(self, collection):
+        self.collection = collection
+        self._names: Optional[Dict[str, str]] = None
+        self._ids: Optional[Dict[str, str]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+    def on_invalidate(self, listener: Callable[[], None]):
+        self._listeners.append(listener)
+
+    def invalidate(self):
+        self._names = None
+        self._ids = None
+        for listener in self._listeners:
+            listener()
+
+    async def _load(self):
+        if self._names is None or time.time() - self._loaded_at > TAXONOMY_CACHE_TTL:
+            async with self._lock:
+                if self._names is None or time.time() - self._loaded_at > TAXONOMY_CACHE_TTL:
+                    docs = await self.collection.find({}, {"name": 1}).to_list(length=None)
+                    self._names = {str(doc["_id"]): doc["name"] for doc in docs}
+                    self._ids = {}
+                    for doc in docs:
+                        self._ids.setdefault(doc["name"], str(doc["_id"]))
+                    self._loaded_at = time.time()
+
+    async def id_to_name(self) -> Dict[str, str]:
+        await self._load()
+        return self._names
+
+    async def name_to_id(self) -> Dict[str, str]:
+        await self._load()
+        return self._ids
+
+    async def names_for(self, ids: List[str]) -> List[str]:
+        names = await self.id_to_name()
+        return [names[_id] for _id in ids or [] if _id in names]
+
+    async def ids_for(self, names: List[str]) -> List[str]:
+        ids = await self.name_to_id()
+        return [ids[name] for name in names or [] if name in ids]
+
+    async def existing_ids(self, ids: List[str]) -> List[str]:
+        if not ids:
+            return []
+        names = await self.id_to_name()
+        return [_id for _id in ids if _id in names]
+
+
+spaces_cache = TaxonomyCache(spaces_collection)
+styles_cache = TaxonomyCache(styles_collection)
+
+
+def cache_for(collection) -> Optional[TaxonomyCache]:
+    for cache in (spaces_cache, styles_cache):
+        if cache.collection is collection:
+            return cache
+    return None
+
+
+async def warm_up_taxonomy():
+    try:
+        for cache in (spaces_cache, styles_cache):
+            await cache.id_to_name()
+    except Exception as e:
+        print(f"Taxonomy cache warm-up failed, it will be loaded on first use: {e}")
@@ -1,6 +1,7 @@
 from backend.api.schemas.user_history import UserHistoryCreate, UserHistoryRead, from_mongo
 from backend.api.models.user_history import UserHistoryDB
 from backend.api.db.database import user_history_collection
+from backend.api.services import user_profile_service
 from bson import ObjectId
 from datetime import datetime, timezone
 from typing import List
@@ -23,27 +24,34 @@ async def create_user_history(history_data: UserHistoryCreate, user_id: str) ->
     
     count = await user_history_collection.count_documents({"user_id": user_id})
 
-    if count >= 50:
+    evicted_product_id = None
+    if count >= user_profile_service.USER_HISTORY_LIMIT:
         oldest_entry = await user_history_collection.find_one({"user_id": user_id}, sort=[("timestamp", 1)])
         if oldest_entry:
             await user_history_collection.delete_one({"_id": oldest_entry["_id"]})
+            evicted_product_id = oldest_entry["product_id"]
 
     await user_history_collection.insert_one(entry.to_dict())
+    await user_profile_service.record_interaction(user_id, entry.product_id, evicted_product_id)
     document = await user_history_collection.find_one({"_id": entry._id})
     return from_mongo(document, UserHistoryRead)
 
-async def get_user_history(user_id: str, skip: int = 0, limit: int = 50) -> List[UserHistoryRead]:
+async def get_user_history(user_id: str, skip: int = 0, limit: int = user_profile_service.USER_HISTORY_LIMIT) -> List[UserHistoryRead]:
     cursor = user_history_collection.find({"user_id": user_id}).sort("timestamp", -1).skip(skip).limit(limit)
     history_docs = await cursor.to_list(length=limit)
     return [from_mongo(doc, UserHistoryRead) for doc in history_docs]
 
 async def delete_user_history() -> bool:
     result = await user_history_collection.delete_many({})
+    await user_profile_service.forget_profiles()
     return result.deleted_count > 0
 
 async def delete_user_history_by_id(history_id: str) -> bool:
     if not ObjectId.is_valid(history_id):
         return False
     
-    result = await user_history_collection.delete_one({"_id": ObjectId(history_id)})
-    return result.deleted_count > 0
+    deleted = await user_history_collection.find_one_and_delete({"_id": ObjectId(history_id)})
+    if deleted is None:
+        return False
+    await user_profile_service.forget_profiles(deleted["user_id"])
+    return True
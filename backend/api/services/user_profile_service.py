@@ -0,0 +1,121 @@
+import os
+from bson import ObjectId
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from backend.api.db.database import user_history_collection, user_profiles_collection
+from backend.api.services import similarity_service
+from backend.api.services.cache import LRUCache
+
+USER_HISTORY_LIMIT = 50
+USER_PROFILE_CACHE_SIZE = int(os.getenv("USER_PROFILE_CACHE_SIZE", 10000))
+USER_PROFILE_TTL = int(os.getenv("USER_PROFILE_TTL", 900))
+
+
+class UserProfile:
+    def __init__(self, weights: Dict[str, int]):
+        self.weights = {product_id: count for product_id, count in weights.items() if count > 0}
+        self.version = None
+        self.vector_sum = None
+        self.vector_count = 0
+
+    def add(self, product_id: str, delta: int):
+        count = self.weights.get(product_id, 0) + delta
+        if count > 0:
+            self.weights[product_id] = count
+        else:
+            self.weights.pop(product_id, None)
+
+        if self.version is None:
+            return
+        vector = similarity_service.similarity_index().vector(product_id)
+        if vector is None:
+            return
+        self.vector_sum = vector * delta if self.vector_sum is None else self.vector_sum + vector * delta
+        self.vector_count += delta
+
+    def vector(self):
+        index = similarity_service.similarity_index()
+        version = (id(index), index.built_at)
+        if self.version != version:
+            self.vector_sum, self.vector_count = None, 0
+            for product_id, count in self.weights.items():
+                vector = index.vector(product_id)
+                if vector is not None:
+                    self.vector_sum = vector * count if self.vector_sum is None else self.vector_sum + vector * count
+                    self.vector_count += count
+            self.version = version
+        if self.vector_count <= 0:
+            return None
+        return self.vector_sum / self.vector_count
+
+
+profile_cache = LRUCache(USER_PROFILE_CACHE_SIZE, USER_PROFILE_TTL)
+
+
+async def get_profile(user_id: str) -> UserProfile:
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    document = await user_profiles_collection.find_one({"_id": user_id})
+    if document is not None:
+        profile = UserProfile(document.get("weights", {}))
+    else:
+        profile = await rebuild_profile(user_id)
+    profile_cache.put(user_id, profile)
+    return profile
+
+
+async def rebuild_profile(user_id: str) -> UserProfile:
+    history = await user_history_collection.find(
+        {"user_id": user_id}, {"product_id": 1}
+    ).sort("timestamp", -1).limit(USER_HISTORY_LIMIT).to_list(length=USER_HISTORY_LIMIT)
+    weights = Counter(doc["product_id"] for doc in history if ObjectId.is_valid(doc["product_id"]))
+    await user_profiles_collection.replace_one(
+        {"_id": user_id},
+        {"_id": user_id, "weights": dict(weights), "updated_at": datetime.now(timezone.utc)},
+        upsert=True
+    )
+    return UserProfile(weights)
+
+
+async def get_profile_vector(user_id: str):
+    await similarity_service.ensure_similarity_index()
+    profile = await get_profile(user_id)
+    if not profile.weights:
+        return None, profile
+    return profile.vector(), profile
+
+
+async def record_interaction(user_id: str, product_id: str, evicted_product_id: Optional[str] = None):
+    changes = Counter()
+    if ObjectId.is_valid(product_id):
+        changes[product_id] += 1
+    if evicted_product_id and ObjectId.is_valid(evicted_product_id):
+        changes[evicted_product_id] -= 1
+    changes = {pid: delta for pid, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    result = await user_profiles_collection.update_one(
+        {"_id": user_id},
+        {"$inc": {f"weights.{pid}": delta for pid, delta in changes.items()}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.matched_count == 0:
+        profile_cache.pop(user_id)
+        return
+
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        for pid, delta in changes.items():
+            profile.add(pid, delta)
+
+
+async def forget_profiles(user_id: Optional[str] = None):
+    if user_id is None:
+        await user_profiles_collection.delete_many({})
+        profile_cache.clear()
+    else:
+        await user_profiles_collection.delete_one({"_id": user_id})
+        profile_cache.pop(user_id)
@@ -0,0 +1,9 @@
+from backend.api.services.product_embeddings_service import backfill_embeddings
+import asyncio
+
+async def main():
+    encoded = await backfill_embeddings()
+    print(f"Encoded {encoded} product descriptions")
+
+if __name__ == "__main__":
+    asyncio.run(main())
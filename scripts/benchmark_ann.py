@@ -0,0 +1,52 @@
+from backend.api.ml.ann_index import IVFIndex, normalize
+import argparse
+import time
+import numpy as np
+
+
+def clustered_vectors(n, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return normalize(centers[rng.integers(0, clusters, n)] + 1.2 * rng.normal(size=(n, dim)))
+
+
+def exact_top_k(vectors, query, k):
+    return set(np.argpartition(-(vectors @ query), k - 1)[:k])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall versus latency of the IVF product index against exact search")
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.products, args.dim, max(1, args.products // 100), args.seed)
+    queries = normalize(vectors[np.random.default_rng(args.seed + 1).choice(args.products, args.queries)] + 0.1)
+    ids = [str(i) for i in range(args.products)]
+
+    started = time.perf_counter()
+    truth = [exact_top_k(vectors, query, args.k) for query in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+    index = IVFIndex(nlist=args.nlist, exact_threshold=0)
+    started = time.perf_counter()
+    index.build(ids, vectors)
+    print(f"{args.products} vectors x {args.dim}, {len(index.centroids)} lists, built in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'search':<10} {'ms/query':>10} {'speedup':>8} {'recall@' + str(args.k):>10}")
+    print(f"{'exact':<10} {exact_ms:>10.3f} {1.0:>8.2f} {1.0:>10.3f}")
+    for nprobe in args.nprobe:
+        started = time.perf_counter()
+        results = [index.search(query, args.k, nprobe=nprobe) for query in queries]
+        ms = (time.perf_counter() - started) * 1000 / args.queries
+        recall = np.mean([len({int(pid) for pid, _ in found} & expected) / args.k for found, expected in zip(results, truth)])
+        print(f"{'nprobe=' + str(nprobe):<10} {ms:>10.3f} {exact_ms / ms:>8.2f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from backend.api.ml.categorization import MODEL_NAME, category_labels, _normalize
+from backend.api.ml.encoders import ENCODER_BACKENDS, load_encoder
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRODUCTS_FILE = Path(__file__).resolve().parent.parent / "backend" / "api" / "output" / "products.xlsx"
+
+
+def load_descriptions(path: Path, limit: int):
+    df = pd.read_excel(path) if path.suffix == ".xlsx" else pd.read_csv(path)
+    return df["description"].dropna().astype(str).tolist()[:limit]
+
+
+def top_k_labels(model, descriptions, batch_size, k):
+    label_embeddings = _normalize(np.asarray(model.encode(category_labels, convert_to_numpy=True), dtype=np.float32))
+
+    started = time.perf_counter()
+    embeddings = model.encode(descriptions, batch_size=batch_size, convert_to_numpy=True)
+    elapsed = time.perf_counter() - started
+
+    scores = _normalize(np.asarray(embeddings, dtype=np.float32)) @ label_embeddings.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare categorization encoder backends against the fp32 baseline")
+    parser.add_argument("--backends", nargs="+", default=list(ENCODER_BACKENDS), choices=list(ENCODER_BACKENDS))
+    parser.add_argument("--products-file", type=Path, default=DEFAULT_PRODUCTS_FILE)
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    descriptions = load_descriptions(args.products_file, args.limit)
+    print(f"{len(descriptions)} descriptions from {args.products_file}, top-{args.k} over {len(category_labels)} category labels")
+
+    baseline_top, baseline_seconds = top_k_labels(load_encoder(MODEL_NAME, "torch"), descriptions, args.batch_size, args.k)
+    print(f"{'backend':<10} {'desc/s':>10} {'speedup':>8} {'top-1 agree':>12} {'top-k overlap':>14}")
+    print(f"{'torch':<10} {len(descriptions) / baseline_seconds:>10.1f} {1.0:>8.2f} {1.0:>12.3f} {1.0:>14.3f}")
+
+    for backend in args.backends:
+        if backend == "torch":
+            continue
+        top, seconds = top_k_labels(load_encoder(MODEL_NAME, backend, args.onnx_file), descriptions, args.batch_size, args.k)
+        top_1 = np.mean(top[:, 0] == baseline_top[:, 0])
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top, baseline_top)])
+        print(f"{backend:<10} {len(descriptions) / seconds:>10.1f} {baseline_seconds / seconds:>8.2f} {top_1:>12.3f} {overlap:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from backend.api.ml.ranking import Ranker
+import argparse
+import time
+import numpy as np
+
+
+def list_ranking(products, similarity, offset, limit):
+    quality = [p.get("rating", 0) * p.get("review_count", 0) for p in products]
+    min_q, max_q = min(quality), max(quality)
+    quality = [(q - min_q) / (max_q - min_q) if max_q != min_q else 0 for q in quality]
+    final_scores = [0.70 * sim + 0.30 * qual for sim, qual in zip(similarity, quality)]
+    ranked = [p for _, p in sorted(zip(final_scores, products), key=lambda pair: pair[0], reverse=True)]
+    return ranked[offset:offset + limit]
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of personalized ranking: list sort versus vectorized top-k")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ranker = Ranker()
+    print(f"{'candidates':>10} {'sorted ms':>10} {'ranker ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        products = [{"rating": float(r), "review_count": int(c)} for r, c in zip(rng.uniform(0, 5, size), rng.integers(0, 500, size))]
+        similarity = rng.random(size)
+
+        baseline = timed(lambda: list_ranking(products, similarity, args.offset, args.limit), args.repeat)
+        vectorized = timed(lambda: ranker.rank(ranker.quality(products), similarity, args.offset, args.limit), args.repeat)
+        print(f"{size:>10} {baseline:>10.3f} {vectorized:>10.3f} {baseline / vectorized:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
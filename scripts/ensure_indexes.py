@@ -0,0 +1,22 @@
+from backend.api.db.indexes import ensure_indexes, index_report
+import argparse
+import asyncio
+
+
+async def main(report_only: bool):
+    if not report_only:
+        for collection_name, result in (await ensure_indexes()).items():
+            print(f"{collection_name}: ensured {result['ensured']}")
+            for name, error in result["failed"].items():
+                print(f"  FAILED {name}: {error}")
+
+    for collection_name, result in (await index_report()).items():
+        unused = "unknown (no $indexStats permission)" if result["unused"] is None else result["unused"] or "none"
+        print(f"{collection_name}: missing {result['missing'] or 'none'}, unexpected {result['unexpected'] or 'none'}, unused {unused}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the expected MongoDB indexes and report missing or unused ones")
+    parser.add_argument("--report-only", action="store_true", help="Only report, do not create indexes")
+    args = parser.parse_args()
+    asyncio.run(main(args.report_only))
@@ -0,0 +1,10 @@
+from backend.api.services.product_neighbors_service import rebuild_neighbor_table
+import asyncio
+
+async def main():
+    stats = await rebuild_neighbor_table()
+    print(f"Rebuilt neighbors for {stats['products']} products (k={stats['k']})")
+    print(f"Index build: {stats['index_seconds']}s, total: {stats['total_seconds']}s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from backend.api.services import job_service
+
+
+class FakeJobsCollection:
+    def __init__(self):
+        self.documents = {}
+
+    def _matches(self, document, query):
+        for field, expected in query.items():
+            if field == "$or":
+                if not any(self._matches(document, option) for option in expected):
+                    return False
+                continue
+            value = document.get(field)
+            if isinstance(expected, dict) and "$nin" in expected:
+                if value in expected["$nin"]:
+                    return False
+            elif isinstance(expected, dict) and "$in" in expected:
+                if value not in expected["$in"]:
+                    return False
+            elif isinstance(expected, dict) and "$lt" in expected:
+                if value is None or value >= expected["$lt"]:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def _update(self, query, update):
+        matched = [doc for doc in self.documents.values() if self._matches(doc, query)]
+        for doc in matched:
+            doc.update(update["$set"])
+        return matched
+
+    async def insert_one(self, document):
+        self.documents[document["_id"]] = dict(document)
+
+    async def update_one(self, query, update):
+        return MagicMock(matched_count=len(self._update(query, update)[:1]))
+
+    async def update_many(self, query, update):
+        return MagicMock(modified_count=len(self._update(query, update)))
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        matched = self._update(query, update)
+        return dict(matched[0]) if matched else None
+
+    async def find_one(self, query):
+        matched = [doc for doc in self.documents.values() if self._matches(doc, query)]
+        return dict(matched[0]) if matched else None
+
+
+@pytest.fixture
+def jobs():
+    collection = FakeJobsCollection()
+    with patch("backend.api.services.job_service.jobs_collection", collection):
+        yield collection
+
+
+async def wait_for(job_id):
+    task = job_service._tasks.get(job_id)
+    if task is not None:
+        await asyncio.gather(task, return_exceptions=True)
+    return await job_service.get_job(job_id)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_records_progress_and_result(jobs):
+    cleanup = MagicMock()
+
+    async def work(report_progress):
+        await report_progress({"rows_processed": 10})
+        return {"inserted": 10}
+
+    submitted = await job_service.submit_job("product_import", work, cleanup=cleanup)
+    assert submitted.status == "queued"
+
+    job = await wait_for(submitted.id)
+    assert job.status == "succeeded"
+    assert job.progress == {"rows_processed": 10}
+    assert job.result == {"inserted": 10}
+    assert job.started_at is not None and job.finished_at is not None
+    cleanup.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cancel_job_stops_a_running_job(jobs):
+    started = asyncio.Event()
+
+    async def work(report_progress):
+        started.set()
+        await asyncio.sleep(60)
+
+    submitted = await job_service.submit_job("product_bulk", work)
+    await started.wait()
+    cancelled = await job_service.cancel_job(submitted.id)
+
+    assert cancelled.cancel_requested
+    job = await wait_for(submitted.id)
+    assert job.status == "cancelled"
+    assert submitted.id not in job_service._tasks
+
+
+@pytest.mark.asyncio
+async def test_cancel_requested_elsewhere_is_seen_on_progress(jobs):
+    async def work(report_progress):
+        await report_progress({"chunk": 1})
+        jobs.documents[next(iter(jobs.documents))]["cancel_requested"] = True
+        await report_progress({"chunk": 2})
+        return {"inserted": 2}
+
+    submitted = await job_service.submit_job("product_import", work)
+    job = await wait_for(submitted.id)
+
+    assert job.status == "cancelled"
+    assert job.progress == {"chunk": 2}
+    assert job.result is None
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error_and_stale_jobs_are_interrupted(jobs):
+    async def work(report_progress):
+        raise RuntimeError("categorization unavailable")
+
+    failed = await wait_for((await job_service.submit_job("product_bulk", work)).id)
+    assert failed.status == "failed"
+    assert failed.error == "categorization unavailable"
+
+    orphan_id = ObjectId()
+    await jobs.insert_one({
+        "_id": orphan_id, "kind": "product_import", "status": "running", "cancel_requested": False,
+        "created_at": datetime.now(timezone.utc), "heartbeat_at": datetime.now(timezone.utc) - timedelta(hours=1),
+    })
+    assert await job_service.recover_jobs() == 1
+    assert (await job_service.get_job(str(orphan_id))).status == "interrupted"
+
+
+@pytest.mark.asyncio
+async def test_running_job_is_not_recovered_locally_and_stops_when_interrupted_elsewhere(jobs):
+    started, resume = asyncio.Event(), asyncio.Event()
+
+    async def work(report_progress):
+        started.set()
+        await resume.wait()
+        await report_progress({"chunk": 1})
+        return {"inserted": 1}
+
+    submitted = await job_service.submit_job("product_import", work)
+    await started.wait()
+    jobs.documents[ObjectId(submitted.id)]["heartbeat_at"] = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    assert await job_service.recover_jobs() == 0
+
+    jobs.documents[ObjectId(submitted.id)]["status"] = "interrupted"
+    resume.set()
+    job = await wait_for(submitted.id)
+
+    assert job.status == "interrupted"
+    assert job.result is None
+    assert job.progress == {"chunk": 1}
+
+
+@pytest.mark.asyncio
+async def test_job_wrongly_interrupted_still_records_its_result(jobs):
+    started, resume = asyncio.Event(), asyncio.Event()
+
+    async def work(report_progress):
+        started.set()
+        await resume.wait()
+        return {"inserted": 5}
+
+    submitted = await job_service.submit_job("product_import", work)
+    await started.wait()
+    jobs.documents[ObjectId(submitted.id)]["status"] = "interrupted"
+    resume.set()
+    job = await wait_for(submitted.id)
+
+    assert job.status == "succeeded"
+    assert job.result == {"inserted": 5}
@@ -0,0 +1,38 @@
+import pytest
+import numpy as np
+from unittest.mock import patch, AsyncMock
+from backend.api.services import product_embeddings_service as service
+
+
+def test_embeddings_round_trip_as_float16():
+    vector = np.array([0.5, -1.25, 3.0], dtype=np.float32)
+    data = service.to_binary(vector)
+
+    assert len(data) == 6
+    assert np.array_equal(service.from_binary(data), vector)
+
+
+@pytest.mark.asyncio
+async def test_refresh_embedding_skips_unchanged_description():
+    stored = {"_id": "p1", "description_hash": service.description_hash("Oak table"), "encoder": service.ENCODER_KEY}
+
+    with patch("backend.api.db.database.product_embeddings_collection.find_one", AsyncMock(return_value=stored)), \
+         patch("backend.api.services.product_embeddings_service.embed_products", AsyncMock()) as mock_embed:
+        await service.refresh_embedding("p1", "Oak table")
+        mock_embed.assert_not_awaited()
+
+        await service.refresh_embedding("p1", "Walnut table")
+        mock_embed.assert_awaited_once_with(["p1"], ["Walnut table"])
+
+
+@pytest.mark.asyncio
+async def test_save_embeddings_writes_one_document_per_product():
+    vectors = np.ones((2, 4), dtype=np.float32)
+
+    with patch("backend.api.db.database.product_embeddings_collection.bulk_write", AsyncMock()) as mock_write:
+        await service.save_embeddings(["p1", "p2"], ["a", "b"], vectors)
+
+    operations = mock_write.await_args.args[0]
+    assert [op._doc["_id"] for op in operations] == ["p1", "p2"]
+    assert operations[0]._doc["dim"] == 4
+    assert operations[0]._doc["description_hash"] == service.description_hash("a")
@@ -0,0 +1,59 @@
+import pytest
+from io import BytesIO
+from openpyxl import Workbook
+from unittest.mock import patch, AsyncMock
+from backend.api.services import product_import_service
+
+
+def chunk_result(rows):
+    return {"inserted": sum(1 for row in rows if row["name"] != "dup"), "skipped": sum(1 for row in rows if row["name"] == "dup")}
+
+
+@pytest.mark.asyncio
+async def test_import_csv_in_chunks_reports_progress_and_summary():
+    content = "name,price,purchase_link\n" + "\n".join(
+        f"{name},10,http://example.com/{i}" for i, name in enumerate(["a", "dup", "b", "", "c"])
+    ) + "\n,,\n"
+    progress = []
+
+    async def record(update):
+        progress.append(update)
+
+    with patch("backend.api.services.products.import_product_rows", AsyncMock(side_effect=chunk_result)) as mock_import:
+        summary = await product_import_service.import_products(BytesIO(content.encode()), "supplier.csv", chunk_size=2, on_progress=record)
+
+    assert [len(call.args[0]) for call in mock_import.await_args_list] == [2, 2, 1]
+    assert mock_import.await_args_list[1].args[0][1] == {"name": None, "price": "10", "purchase_link": "http://example.com/3"}
+    assert summary == {"inserted": 4, "skipped": 1, "total": 5, "chunks": 3, "failed_chunks": []}
+    assert sorted(p["chunk"] for p in progress) == [1, 2, 3]
+    assert max(p["rows_processed"] for p in progress) == 5
+
+
+@pytest.mark.asyncio
+async def test_import_xlsx_streams_rows_and_records_failed_chunks():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "price", "spaces"])
+    for i in range(3):
+        sheet.append([f"product {i}", 10.0 + i, "['office']"])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+
+    async def fail_second_chunk(rows):
+        if rows[0]["name"] == "product 2":
+            raise RuntimeError("insert failed")
+        return {"inserted": len(rows), "skipped": 0}
+
+    with patch("backend.api.services.products.import_product_rows", AsyncMock(side_effect=fail_second_chunk)) as mock_import:
+        summary = await product_import_service.import_products(buffer, "supplier.xlsx", chunk_size=2, on_progress=AsyncMock())
+
+    assert mock_import.await_args_list[0].args[0][0] == {"name": "product 0", "price": 10.0, "spaces": "['office']"}
+    assert summary["inserted"] == 2 and summary["skipped"] == 1 and summary["total"] == 3
+    assert summary["failed_chunks"] == [{"chunk": 2, "rows": 1, "error": "insert failed"}]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_unsupported_formats():
+    with pytest.raises(ValueError):
+        await product_import_service.import_products(BytesIO(b""), "supplier.json")
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from backend.api.services import product_index_service
+
+
+@pytest.mark.asyncio
+async def test_stale_index_is_served_while_a_single_rebuild_runs_in_background():
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_rebuild():
+        started.set()
+        await release.wait()
+
+    with patch.object(product_index_service.product_index, "built_at", 1.0), \
+         patch.object(product_index_service.product_index, "is_stale", return_value=True), \
+         patch("backend.api.services.product_index_service.rebuild_product_index", AsyncMock(side_effect=slow_rebuild)) as mock_rebuild:
+        await product_index_service.ensure_product_index()
+        await product_index_service.ensure_product_index()
+        await started.wait()
+        release.set()
+        await product_index_service._background_rebuild
+
+    assert mock_rebuild.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_index_is_built_inline():
+    with patch.object(product_index_service.product_index, "built_at", None), \
+         patch("backend.api.services.product_index_service.rebuild_product_index", AsyncMock()) as mock_rebuild:
+        await product_index_service.ensure_product_index()
+
+    mock_rebuild.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_similar_products_waits_for_a_running_rebuild_to_index_a_new_product():
+    from bson import ObjectId
+    from backend.api.ml.product_index import ProductSimilarityIndex
+    from backend.api.schemas.products import ProductRead
+
+    index = ProductSimilarityIndex()
+    index.build(["a" * 24, "b" * 24], ["oak dining table", "linen sofa"])
+    new_id = str(ObjectId())
+    product = ProductRead(id=new_id, name="Table", description="oak table", price=1.0,
+                          purchase_link="http://example.com/t", image_url="http://example.com/t.jpg")
+
+    async def hold_lock():
+        async with product_index_service._rebuild_lock:
+            await asyncio.sleep(0.01)
+            while product_index_service._writes_during_rebuild:
+                await product_index_service._writes_during_rebuild.pop(0)()
+
+    with patch("backend.api.services.product_index_service.product_index", index), \
+         patch("backend.api.services.product_index_service.ensure_product_index", AsyncMock()), \
+         patch("backend.api.services.product_index_service.build_product_corpus", AsyncMock(return_value="oak table")), \
+         patch("backend.api.services.product_index_service.products_collection.find",
+               return_value=AsyncMock(to_list=AsyncMock(return_value=[]))):
+        rebuild = asyncio.create_task(hold_lock())
+        await asyncio.sleep(0)
+        await product_index_service.get_similar_products(product, 1)
+        await rebuild
+
+    assert new_id in index
+
+
+@pytest.mark.asyncio
+async def test_rebuild_hashes_and_fits_off_the_event_loop():
+    import threading
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    index = ProductSimilarityIndex()
+    threads = []
+
+    def fit(counts):
+        threads.append(threading.get_ident())
+        return ProductSimilarityIndex.fit(counts)
+
+    async def catalog():
+        yield [{"_id": "a" * 24, "name": "oak dining table"}, {"_id": "b" * 24, "name": "linen sofa"}]
+
+    with patch("backend.api.services.product_index_service.product_index", index), \
+         patch.object(index, "fit", side_effect=fit), \
+         patch("backend.api.services.product_index_service.iter_catalog", catalog), \
+         patch("backend.api.services.product_index_service.spaces_cache.id_to_name", AsyncMock(return_value={})), \
+         patch("backend.api.services.product_index_service.styles_cache.id_to_name", AsyncMock(return_value={})):
+        count = await product_index_service.rebuild_product_index()
+
+    assert count == 2 and "a" * 24 in index
+    assert threads and threads[0] != threading.get_ident()
@@ -1,11 +1,14 @@
 import pytest
 from unittest.mock import patch, AsyncMock
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from backend.api.schemas.products import ProductCreate, ProductUpdate, ProductRead
 from backend.api.services.products import *
 
 from unittest.mock import MagicMock
 
+TAXONOMY_IDS = {name: str(ObjectId()) for name in ["living room", "office", "dining room", "rustic", "modern", "minimalist"]}
+
 @pytest.mark.asyncio
 async def test_list_products_returns_list():
     mock_docs = [
@@ -85,8 +88,7 @@ async def test_create_product_conflict():
 
     with patch("backend.api.db.database.products_collection.count_documents", AsyncMock(return_value=1)), \
          patch("backend.api.services.products.load_embeddings", AsyncMock(return_value = mocked_embeddings)), \
-         patch("backend.api.ml.categorization.spaces_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})), \
-         patch("backend.api.ml.categorization.styles_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})):
+         patch("backend.api.services.taxonomy_service.TaxonomyCache.name_to_id", AsyncMock(return_value=TAXONOMY_IDS)):
         result = await create_product(data)
         assert result is None
 
@@ -117,11 +119,12 @@ async def test_create_product_success():
          patch("backend.api.db.database.products_collection.insert_one", AsyncMock(return_value=AsyncMock(inserted_id=inserted_id))), \
          patch("backend.api.db.database.products_collection.find_one", AsyncMock(return_value=mock_doc)), \
          patch("backend.api.services.products.load_embeddings", AsyncMock(return_value = mocked_embeddings)), \
-         patch("backend.api.ml.categorization.spaces_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})), \
-         patch("backend.api.ml.categorization.styles_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})):
+         patch("backend.api.services.taxonomy_service.TaxonomyCache.name_to_id", AsyncMock(return_value=TAXONOMY_IDS)), \
+         patch("backend.api.services.products.product_embeddings_service.save_embeddings", AsyncMock()) as mock_save:
 
         result = await create_product(data)
         print(result)
+        assert mock_save.await_args.args[0] == [str(inserted_id)]
         assert result.name == "Table"
         assert result.id == str(inserted_id)
 
@@ -153,7 +156,8 @@ async def test_create_product_no_category_space_style():
         patch("backend.api.db.database.products_collection.insert_one", AsyncMock(return_value=AsyncMock(inserted_id=inserted_id))), \
         patch("backend.api.db.database.products_collection.find_one", AsyncMock(return_value=mock_doc)), \
         patch("backend.api.services.products.categorize_product_by_description", return_value=("desks and desk chairs", ["office"], ["modern"])), \
-        patch("backend.api.services.products.load_embeddings", AsyncMock(return_value=mocked_embeddings)):
+        patch("backend.api.services.products.load_embeddings", AsyncMock(return_value=mocked_embeddings)), \
+        patch("backend.api.services.products.product_embeddings_service.save_embeddings", AsyncMock()):
 
         result = await create_product(data)
         assert result.name == "Desk"
@@ -220,19 +224,22 @@ async def test_create_products_bulk_success():
         "reviews": []
     }
 
-    async def find_one_side_effect(query):
-        if query["purchase_link"] == "http://example.com/lampara1":
-            return existing_doc
-        return None
+    def find_side_effect(query):
+        links = query["purchase_link"]["$in"]
+        return AsyncMock(to_list=AsyncMock(return_value=[existing_doc] if existing_doc["purchase_link"] in links else []))
 
     with patch("backend.api.services.products.load_embeddings", AsyncMock(return_value=mocked_embeddings)), \
-         patch("backend.api.services.products.products_collection.find_one", side_effect=find_one_side_effect), \
-         patch("backend.api.services.products.products_collection.insert_many", AsyncMock(return_value=AsyncMock(inserted_ids=[created_doc["_id"]]))), \
-         patch("backend.api.services.products.products_collection.find", return_value=AsyncMock(to_list=AsyncMock(return_value=[created_doc]))), \
-         patch("backend.api.ml.categorization.spaces_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})), \
-         patch("backend.api.ml.categorization.styles_collection.find_one", AsyncMock(return_value={"_id": ObjectId()})):
+         patch("backend.api.services.products.products_collection.insert_many", AsyncMock(return_value=AsyncMock(inserted_ids=[created_doc["_id"]]))) as mock_insert, \
+         patch("backend.api.services.products.products_collection.find", side_effect=find_side_effect) as mock_find, \
+         patch("backend.api.services.taxonomy_service.TaxonomyCache.name_to_id", AsyncMock(return_value={"office": str(ObjectId()), "modern": str(ObjectId())})), \
+         patch("backend.api.services.products.product_embeddings_service.save_embeddings", AsyncMock()) as mock_save:
 
         result = await create_products(products_data)
+        assert mock_find.call_count == 1
+        assert [doc["purchase_link"] for doc in mock_insert.await_args.args[0]] == ["http://example.com/silla1"]
+        saved_ids, saved_descriptions, saved_vectors = mock_save.await_args.args
+        assert saved_descriptions == [products_data[1].description]
+        assert len(saved_ids) == 1 and len(saved_vectors) == 1
 
         assert isinstance(result, dict)
         assert len(result["created"]) == 1
@@ -248,6 +255,22 @@ async def test_create_products_bulk_success():
 
 
 
+@pytest.mark.asyncio
+async def test_insert_new_products_reports_duplicate_key_indices():
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key error"}]})
+
+    with patch("backend.api.services.products.products_collection.insert_many", AsyncMock(side_effect=error)) as mock_insert:
+        duplicates = await insert_new_products([{"purchase_link": "a"}, {"purchase_link": "b"}])
+
+    assert duplicates == {1}
+    assert mock_insert.await_args.kwargs == {"ordered": False}
+
+    other = BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}]})
+    with patch("backend.api.services.products.products_collection.insert_many", AsyncMock(side_effect=other)):
+        with pytest.raises(BulkWriteError):
+            await insert_new_products([{"purchase_link": "a"}])
+
+
 @pytest.mark.asyncio
 async def test_delete_product_success():
     product_id = str(ObjectId())
@@ -259,7 +282,9 @@ async def test_delete_product_success():
 
     with patch("backend.api.services.products.get_product", AsyncMock(return_value=mock_product)), \
          patch("backend.api.db.database.products_collection.delete_one", AsyncMock()), \
-         patch("backend.api.services.products.users_collection.update_many", AsyncMock()):
+         patch("backend.api.services.products.users_collection.update_many", AsyncMock()), \
+         patch("backend.api.services.products.product_neighbors_service.remove_product_neighbors", AsyncMock()), \
+         patch("backend.api.services.products.product_embeddings_service.delete_embeddings", AsyncMock()):
         result = await delete_product(product_id)
         assert result is mock_product
 
@@ -271,7 +296,8 @@ async def test_delete_product_invalid_id():
 
 @pytest.mark.asyncio
 async def test_delete_all_products_success():
-    with patch("backend.api.db.database.products_collection.delete_many", AsyncMock()):
+    with patch("backend.api.db.database.products_collection.delete_many", AsyncMock()), \
+         patch("backend.api.services.products.product_embeddings_service.delete_embeddings", AsyncMock()):
         result = await delete_all_products()
         assert result is True
 
@@ -289,7 +315,153 @@ async def test_update_product_success():
         ProductRead(id=product_id, name="Lamp", description="Old", price=29.99,
                     purchase_link="http://example.com/lamp", image_url="http://example.com/lamp.jpg", category="lighting", spaces=["living room"], styles=["modern"], rating=4.5, review_count=10, reviews=[]),
         ProductRead(**updated_doc, id=product_id)
-    ]), patch("backend.api.db.database.products_collection.update_one", AsyncMock()):
+    ]), patch("backend.api.db.database.products_collection.update_one", AsyncMock()), \
+         patch("backend.api.services.products.product_embeddings_service.refresh_embedding", AsyncMock()) as mock_refresh:
         result = await update_product(product_id, updated)
         assert result.description == "Updated"
+        mock_refresh.assert_awaited_once_with(product_id, "Updated")
+
+
+
+@pytest.mark.asyncio
+async def test_get_product_recommendations_uses_product_index():
+    from backend.api.services import product_index_service
+
+    def make_doc(name, description):
+        return {
+            "_id": ObjectId(), "name": name, "description": description, "price": 10.0,
+            "purchase_link": f"http://example.com/{name}", "image_url": f"http://example.com/{name}.jpg",
+            "category": "lighting", "spaces": [], "styles": [], "rating": 0.0, "review_count": 0, "reviews": []
+        }
+
+    docs = [
+        make_doc("lamp", "brass floor lamp"),
+        make_doc("desk-lamp", "brass desk lamp"),
+        make_doc("sofa", "grey linen sofa"),
+    ]
+
+    class FakeCursor:
+        def __init__(self, documents):
+            self.documents = documents
+            self.to_list = AsyncMock(return_value=documents)
+
+        def batch_size(self, size):
+            return self
+
+        async def __aiter__(self):
+            for document in self.documents:
+                yield document
+
+    def find_side_effect(query=None, projection=None, *args, **kwargs):
+        if query and "_id" in query:
+            wanted = set(query["_id"]["$in"])
+            return FakeCursor([dict(d) for d in docs if d["_id"] in wanted])
+        assert "reviews" not in projection
+        return FakeCursor([{k: d[k] for k in ["_id", *projection]} for d in docs])
+
+    product_index_service.product_index.invalidate()
+    with patch("backend.api.services.products.get_product", AsyncMock(return_value=from_mongo(dict(docs[0]), ProductRead))), \
+         patch("backend.api.db.database.products_collection.find", side_effect=find_side_effect), \
+         patch("backend.api.db.database.product_neighbors_collection.find_one", AsyncMock(return_value=None)), \
+         patch("backend.api.db.database.product_neighbors_collection.replace_one", AsyncMock()) as mock_replace, \
+         patch("backend.api.services.taxonomy_service.TaxonomyCache.id_to_name", AsyncMock(return_value={})):
+        result = await get_product_recommendations(str(docs[0]["_id"]), 1)
+
+    assert [p.name for p in result] == ["desk-lamp"]
+    assert mock_replace.await_args.args[1]["neighbors"][0] == str(docs[1]["_id"])
+    product_index_service.product_index.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_get_product_recommendations_uses_neighbor_table():
+    product_id, neighbor_id = ObjectId(), ObjectId()
+    docs = [
+        {"_id": _id, "name": name, "description": "d", "price": 1.0, "purchase_link": f"http://example.com/{name}",
+         "image_url": f"http://example.com/{name}.jpg", "category": "lighting", "spaces": [], "styles": [],
+         "rating": 0.0, "review_count": 0, "reviews": []}
+        for _id, name in [(product_id, "lamp"), (neighbor_id, "desk-lamp")]
+    ]
+    entry = {"_id": str(product_id), "neighbors": [str(neighbor_id)], "stale": False}
+
+    with patch("backend.api.db.database.product_neighbors_collection.find_one", AsyncMock(return_value=entry)), \
+         patch("backend.api.db.database.products_collection.find", return_value=MagicMock(to_list=AsyncMock(return_value=docs))), \
+         patch("backend.api.services.products.product_index_service.get_similar_products", AsyncMock()) as mock_live:
+        result = await get_product_recommendations(str(product_id), 1)
+
+    assert [p.name for p in result] == ["desk-lamp"]
+    mock_live.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_scoring_fetch_uses_projection_and_hydration_preserves_order():
+    first, second = ObjectId(), ObjectId()
+    docs = [
+        {"_id": second, "name": "Sofa", "description": "Grey", "price": 300.0, "purchase_link": "http://example.com/sofa",
+         "image_url": "http://example.com/sofa.jpg", "category": "sofas and armchairs", "spaces": [], "styles": [],
+         "rating": 4.0, "review_count": 3, "reviews": []},
+        {"_id": first, "name": "Lamp", "description": "Brass", "price": 40.0, "purchase_link": "http://example.com/lamp",
+         "image_url": "http://example.com/lamp.jpg", "category": "lighting", "spaces": [], "styles": [],
+         "rating": 5.0, "review_count": 1, "reviews": []},
+    ]
+    mock_find = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=docs)))
+
+    with patch("backend.api.services.products.products_collection.find", mock_find):
+        await get_products_by_ids([str(second), str(first)], SCORING_PROJECTION)
+        products = await hydrate_products([str(first), "invalid", str(second)])
+
+    scoring_query, scoring_projection = mock_find.call_args_list[0].args
+    assert scoring_query == {"_id": {"$in": [second, first]}}
+    assert scoring_projection == SCORING_PROJECTION and "reviews" not in scoring_projection
+    assert mock_find.call_args_list[1].args == ({"_id": {"$in": [first, second]}}, None)
+    assert [p.name for p in products] == ["Lamp", "Sofa"]
+
+
+@pytest.mark.asyncio
+async def test_validate_ids_uses_one_in_query_and_preserves_order():
+    first, second, missing = ObjectId(), ObjectId(), ObjectId()
+    collection = MagicMock()
+    collection.find = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=[{"_id": second}, {"_id": first}])))
+
+    valid = await validate_and_filter_existing_ids([str(first), "bad", str(missing), str(second), str(first)], collection)
+
+    assert valid == [str(first), str(second), str(first)]
+    collection.find.assert_called_once()
+    assert collection.find.call_args.args[0] == {"_id": {"$in": [first, missing, second]}}
+
+
+@pytest.mark.asyncio
+async def test_add_product_review_is_a_single_atomic_update():
+    product_id = ObjectId()
+    updated = {"_id": product_id, "name": "Lamp", "description": "Desk lamp", "price": 30.0,
+               "purchase_link": "http://example.com/lamp", "image_url": "http://example.com/lamp.jpg", "category": "lighting",
+               "spaces": ["office"], "styles": ["modern"], "rating": 4.5, "review_count": 2, "rating_sum": 9.0}
+
+    with patch("backend.api.services.products.products_collection.find_one_and_update", AsyncMock(return_value=updated)) as mock_update, \
+         patch("backend.api.services.products.products_collection.find_one", AsyncMock()) as mock_find_one, \
+         patch("backend.api.services.products.product_index_service.update_product_attributes", AsyncMock()) as mock_attributes, \
+         patch("backend.api.services.products.ranking_cache_service.invalidate_rankings") as mock_invalidate:
+        review = await add_product_review(str(product_id), ProductReviewCreate(rating=5, comment="$great"), "user1", "ana")
+
+    query, pipeline = mock_update.await_args.args
+    assert query == {"_id": product_id}
+    assert isinstance(pipeline, list)
+    appended = pipeline[1]["$set"]["reviews"]["$concatArrays"][1][0]["$literal"]
+    assert appended["id"] == review.id and appended["comment"] == "$great"
+    assert pipeline[1]["$set"]["rating_sum"] == {"$add": ["$rating_sum", 5.0]}
+    assert mock_update.await_args.kwargs["projection"] == {"reviews": 0}
+    mock_find_one.assert_not_awaited()
+    assert mock_attributes.await_args.args[0].rating == 4.5
+    mock_invalidate.assert_called_once_with({"office"}, {"modern"})
+
+
+@pytest.mark.asyncio
+async def test_delete_product_review_matches_the_review_in_the_update():
+    product_id = ObjectId()
+
+    with patch("backend.api.services.products.products_collection.find_one_and_update", AsyncMock(return_value=None)) as mock_update, \
+         patch("backend.api.services.products.product_index_service.update_product_attributes", AsyncMock()) as mock_attributes:
+        deleted = await delete_product_review(str(product_id), "missing-review", "user1")
 
+    assert deleted is False
+    assert mock_update.await_args.args[0] == {"_id": product_id, "reviews.id": "missing-review"}
+    mock_attributes.assert_not_awaited()
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from backend.api.services import ranking_cache_service as service
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    service.ranking_cache.clear()
+    yield
+    service.ranking_cache.clear()
+
+
+def find_returning(documents):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=documents)
+    return MagicMock(return_value=cursor)
+
+
+@pytest.mark.asyncio
+async def test_get_ranked_ids_orders_by_quality_and_caches():
+    documents = [
+        {"_id": "a", "rating": 4.0, "review_count": 1},
+        {"_id": "b", "rating": 5.0, "review_count": 10},
+        {"_id": "c", "rating": 1.0, "review_count": 2},
+        {"_id": "d", "rating": 4.0, "review_count": 1},
+    ]
+    mock_find = find_returning(documents)
+
+    with patch("backend.api.db.database.products_collection.find", mock_find):
+        first = await service.get_ranked_ids("space1", "style1", ["lamp", "lamp"])
+        second = await service.get_ranked_ids("space1", "style1", ["lamp"])
+
+    assert first == second == ["b", "a", "d", "c"]
+    mock_find.assert_called_once_with(
+        {"spaces": "space1", "styles": "style1", "category": {"$in": ["lamp"]}},
+        service.RANKING_PROJECTION
+    )
+
+
+def test_invalidate_product_rankings_drops_only_affected_keys():
+    product = MagicMock(spaces=["space1"], styles=["style1", "style2"])
+    service.ranking_cache.put(service.ranking_key("space1", "style2"), ["a"])
+    service.ranking_cache.put(service.ranking_key("space1", "style3"), ["b"])
+    service.ranking_cache.put(service.ranking_key("space2", "style1", ["lamp"]), ["c"])
+
+    service.invalidate_product_rankings(product)
+
+    assert service.ranking_cache.keys() == [service.ranking_key("space1", "style3"), service.ranking_key("space2", "style1", ["lamp"])]
+
+    service.invalidate_rankings()
+    assert len(service.ranking_cache) == 0
@@ -162,6 +162,21 @@ async def test_update_space_success():
 
 
 
+@pytest.mark.asyncio
+async def test_update_space_reads_its_write_from_the_primary_when_routing():
+    space_id = ObjectId()
+    before = {"_id": space_id, "name": "Boho", "description": "Old", "image": "http://example.com/img.jpg"}
+    after = {**before, "description": "Updated"}
+
+    with patch("backend.api.db.database.MONGO_READ_ROUTING", "secondaryPreferred"), \
+         patch.dict("backend.api.db.database._read_handles", clear=True), \
+         patch("backend.api.db.database.spaces_collection.find_one", AsyncMock(side_effect=[before, after])), \
+         patch("backend.api.db.database.spaces_collection.update_one", new_callable=AsyncMock):
+        result = await update_space(str(space_id), SpaceUpdate(description="Updated"))
+
+    assert result.description == "Updated"
+
+
 @pytest.mark.asyncio
 async def test_delete_space_success():
     space_id = str(ObjectId())
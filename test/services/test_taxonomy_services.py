@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from bson import ObjectId
+from backend.api.services.taxonomy_service import TaxonomyCache
+from backend.api.db.database import spaces_collection
+
+
+@pytest.mark.asyncio
+async def test_taxonomy_cache_loads_once_until_invalidated():
+    office_id, garden_id = ObjectId(), ObjectId()
+    docs = [{"_id": office_id, "name": "office"}, {"_id": garden_id, "name": "garden"}]
+    cache = TaxonomyCache(spaces_collection)
+
+    with patch("backend.api.db.database.spaces_collection.find", return_value=MagicMock(to_list=AsyncMock(return_value=docs))) as mock_find:
+        first = await cache.names_for([str(garden_id), "missing", str(office_id)])
+        second = await cache.names_for([str(office_id)])
+        assert mock_find.call_count == 1
+
+        cache.invalidate()
+        await cache.id_to_name()
+        assert mock_find.call_count == 2
+
+    assert first == ["garden", "office"]
+    assert second == ["office"]
+
+
+@pytest.mark.asyncio
+async def test_create_space_invalidates_taxonomy_cache():
+    from backend.api.services.spaces import create_space
+    from backend.api.services.taxonomy_service import spaces_cache
+    from backend.api.schemas.spaces import SpaceCreate
+
+    spaces_cache._names = {"stale": "stale"}
+    inserted_id = ObjectId()
+    doc = {"_id": inserted_id, "name": "Patio", "description": "Outdoor", "image": "http://example.com/patio.jpg"}
+
+    with patch("backend.api.db.database.spaces_collection.count_documents", AsyncMock(return_value=0)), \
+         patch("backend.api.db.database.spaces_collection.insert_one", AsyncMock(return_value=MagicMock(inserted_id=inserted_id))), \
+         patch("backend.api.db.database.spaces_collection.find_one", AsyncMock(return_value=doc)):
+        await create_space(SpaceCreate(name="Patio", description="Outdoor", image="http://example.com/patio.jpg"))
+
+    assert spaces_cache._names is None
+
+
+@pytest.mark.asyncio
+async def test_label_embeddings_are_reused_until_taxonomy_changes():
+    from backend.api.services import categorization_service
+    from backend.api.services.taxonomy_service import styles_cache
+    from backend.api.schemas.spaces import SpaceRead
+    from backend.api.schemas.styles import StyleRead
+
+    spaces = [SpaceRead(id=str(ObjectId()), name="Office", description="Work", image="http://example.com/o.jpg")]
+    styles = [StyleRead(id=str(ObjectId()), name="Rustic", description="Wood", image="http://example.com/r.jpg")]
+
+    categorization_service.invalidate_embeddings()
+    with patch("backend.api.services.categorization_service.list_spaces", AsyncMock(return_value=(spaces, 1))) as mock_spaces, \
+         patch("backend.api.services.categorization_service.list_styles", AsyncMock(return_value=(styles, 1))), \
+         patch.object(categorization_service.label_embedding_cache, "get", side_effect=lambda labels: [[0.0]] * len(labels)):
+        first = await categorization_service.load_embeddings()
+        second = await categorization_service.load_embeddings()
+        assert mock_spaces.await_count == 1
+
+        styles_cache.invalidate()
+        await categorization_service.load_embeddings()
+        assert mock_spaces.await_count == 2
+        assert mock_spaces.await_args.kwargs["fresh"] is True
+
+    assert first is second
+    assert first[3] == ["Office"] and first[4] == ["Rustic"]
+    categorization_service.invalidate_embeddings()
+
+
+@pytest.mark.asyncio
+async def test_taxonomy_cache_resolves_names_and_validates_ids():
+    from backend.api.ml.categorization import get_ids_from_names
+    from backend.api.services.products import validate_and_filter_existing_ids
+    from backend.api.services.taxonomy_service import spaces_cache
+
+    office_id, garden_id = ObjectId(), ObjectId()
+    docs = [{"_id": office_id, "name": "office"}, {"_id": garden_id, "name": "garden"}]
+    spaces_cache.invalidate()
+
+    with patch("backend.api.db.database.spaces_collection.find", return_value=MagicMock(to_list=AsyncMock(return_value=docs))) as mock_find, \
+         patch("backend.api.db.database.spaces_collection.find_one", AsyncMock()) as mock_find_one:
+        ids = await get_ids_from_names(["garden", "attic", "office"], spaces_collection)
+        valid = await validate_and_filter_existing_ids([str(office_id), "not-an-id", str(ObjectId())], spaces_collection)
+
+    spaces_cache.invalidate()
+    assert ids == [str(garden_id), str(office_id)]
+    assert valid == [str(office_id)]
+    assert mock_find.call_count == 1
+    mock_find_one.assert_not_awaited()
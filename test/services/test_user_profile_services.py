@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+from bson import ObjectId
+from unittest.mock import patch, AsyncMock, MagicMock
+from backend.api.ml.ann_index import IVFIndex
+from backend.api.services import user_profile_service as service
+from backend.api.services.cache import LRUCache
+
+P1, P2, P3 = (str(ObjectId()) for _ in range(3))
+
+
+@pytest.fixture
+def index():
+    index = IVFIndex()
+    index.build([P1, P2, P3], np.eye(3))
+    with patch("backend.api.services.similarity_service.similarity_index", return_value=index):
+        yield index
+    service.profile_cache.clear()
+
+
+def test_profile_cache_evicts_least_recently_used_and_expired():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.put("a", "profile-a")
+    cache.put("b", "profile-b")
+    cache.get("a")
+    cache.put("c", "profile-c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "profile-a"
+
+    cache.ttl = -1
+    assert cache.get("c") is None
+
+
+def test_profile_vector_is_weighted_mean_and_updates_incrementally(index):
+    profile = service.UserProfile({P1: 2, P2: 1})
+    assert np.allclose(profile.vector(), [2 / 3, 1 / 3, 0])
+
+    profile.add(P3, 1)
+    profile.add(P1, -2)
+    assert np.allclose(profile.vector(), [0, 0.5, 0.5])
+    assert profile.weights == {P2: 1, P3: 1}
+
+
+@pytest.mark.asyncio
+async def test_get_profile_rebuilds_from_history_once(index):
+    cursor = MagicMock()
+    cursor.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[{"product_id": P1}, {"product_id": P1}, {"product_id": P2}])
+
+    with patch("backend.api.db.database.user_profiles_collection.find_one", AsyncMock(return_value=None)), \
+         patch("backend.api.db.database.user_profiles_collection.replace_one", AsyncMock()) as mock_replace, \
+         patch("backend.api.db.database.user_history_collection.find", return_value=cursor) as mock_find:
+        first = await service.get_profile("user1")
+        second = await service.get_profile("user1")
+
+    assert first is second
+    assert first.weights == {P1: 2, P2: 1}
+    mock_find.assert_called_once()
+    assert mock_replace.await_args.args[1]["weights"] == {P1: 2, P2: 1}
+
+
+@pytest.mark.asyncio
+async def test_record_interaction_updates_stored_and_cached_profile(index):
+    profile = service.UserProfile({P1: 1})
+    profile.vector()
+    service.profile_cache.put("user1", profile)
+
+    with patch("backend.api.db.database.user_profiles_collection.update_one", AsyncMock(return_value=MagicMock(matched_count=1))) as mock_update:
+        await service.record_interaction("user1", P2, evicted_product_id=P1)
+
+    assert mock_update.await_args.args[1]["$inc"] == {f"weights.{P2}": 1, f"weights.{P1}": -1}
+    assert profile.weights == {P2: 1}
+    assert np.allclose(profile.vector(), [0, 1, 0])
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from backend.api.db import database
+
+
+def test_client_options_drop_unset_values_and_unavailable_compressors():
+    with patch("backend.api.db.database.MONGO_MAX_POOL_SIZE", 50), \
+         patch("backend.api.db.database.MONGO_SOCKET_TIMEOUT_MS", None), \
+         patch("backend.api.db.database.MONGO_READ_PREFERENCE", "secondaryPreferred"), \
+         patch("backend.api.db.database.MONGO_COMPRESSORS", ["zstd", "zlib", "lz4"]), \
+         patch("backend.api.db.database.importlib.util.find_spec", side_effect=lambda name: name == "zlib"):
+        options = database.client_options()
+
+    assert options["maxPoolSize"] == 50
+    assert options["readPreference"] == "secondaryPreferred"
+    assert options["compressors"] == "zlib"
+    assert "socketTimeoutMS" not in options
+
+
+def test_pool_stats_listener_tracks_checkouts():
+    listener = database.PoolStatsListener()
+    event = MagicMock(duration=0.0)
+
+    listener.connection_created(event)
+    listener.connection_checked_out(event)
+    listener.connection_checked_out(event)
+    listener.connection_checked_in(event)
+    listener.connection_check_out_failed(event)
+
+    assert listener.stats["connections_created"] == 1
+    assert listener.stats["checked_out"] == 2
+    assert listener.stats["in_use"] == 1
+    assert listener.stats["checkout_failures"] == 1
+
+
+def test_pool_stats_listener_tracks_checkout_waits():
+    listener = database.PoolStatsListener()
+
+    listener.connection_checked_out(MagicMock(duration=0.004))
+    listener.connection_checked_out(MagicMock(duration=0.010))
+    listener.connection_check_out_failed(MagicMock(duration=0.002))
+
+    assert listener.stats["checkout_wait_total_ms"] == pytest.approx(16.0)
+    assert listener.stats["checkout_wait_max_ms"] == pytest.approx(10.0)
+    assert listener.stats["checkout_wait_last_ms"] == pytest.approx(2.0)
+
+    with patch("backend.api.db.database.pool_stats", listener):
+        assert database.pool_status()["checkout_wait_avg_ms"] == pytest.approx(16.0 / 3)
+
+
+@pytest.mark.asyncio
+async def test_db_pool_endpoint_reports_stats(async_client, override_is_admin):
+    response = await async_client.get("/api/v1/db/pool")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["max_pool_size"] == database.client_options()["maxPoolSize"]
+    assert "in_use" in body and "compressors" in body
+    assert "checkout_wait_max_ms" in body and "checkout_wait_avg_ms" in body
+
+
+def test_read_collection_routes_only_when_configured():
+    collection = database.products_collection
+
+    with patch("backend.api.db.database.MONGO_READ_ROUTING", "primary"):
+        assert database.read_collection(collection) is collection
+
+    with patch("backend.api.db.database.MONGO_READ_ROUTING", "secondaryPreferred"), \
+         patch.dict(database._read_handles, clear=True):
+        routed = database.read_collection(collection)
+        assert routed.read_preference.mongos_mode == "secondaryPreferred"
+        assert database.read_collection(collection) is routed
+        assert database.read_collection(collection, fresh=True) is collection
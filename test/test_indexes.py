@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from pymongo.errors import OperationFailure
+from backend.api.db import indexes
+
+
+class FakeIndexCursor:
+    def __init__(self, items):
+        self.items = items
+
+    def __aiter__(self):
+        self._iter = iter(self.items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def fake_collection(existing=(), stats=None, fail=()):
+    collection = MagicMock()
+
+    async def create_indexes(models):
+        name = models[0].document["name"]
+        if name in fail:
+            raise OperationFailure("E11000 duplicate key error", code=11000, details={"errmsg": "E11000 duplicate key error"})
+        return [name]
+
+    collection.create_indexes = AsyncMock(side_effect=create_indexes)
+    collection.list_indexes = MagicMock(return_value=FakeIndexCursor([{"name": "_id_", "key": {"_id": 1}}, *existing]))
+    if stats is None:
+        collection.aggregate = MagicMock(return_value=MagicMock(to_list=AsyncMock(side_effect=OperationFailure("not authorized"))))
+    else:
+        collection.aggregate = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=stats)))
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_reports_failures_per_index():
+    collections = {name: fake_collection(fail={"purchase_link_unique"} if name == "products" else ()) for name in indexes.INDEXES}
+
+    with patch("backend.api.db.indexes.database.get_collection", side_effect=collections.get):
+        report = await indexes.ensure_indexes()
+
+    assert report["products"]["ensured"] == ["spaces_category", "styles_category"]
+    assert "duplicate key" in report["products"]["failed"]["purchase_link_unique"]
+    assert report["users"]["ensured"] == ["username_unique", "email_unique"]
+    assert report["users"]["failed"] == {}
+
+
+@pytest.mark.asyncio
+async def test_index_report_lists_missing_unexpected_and_unused():
+    products = fake_collection(
+        existing=[
+            {"name": "spaces_category", "key": {"spaces": 1, "category": 1}},
+            {"name": "legacy_name", "key": {"name": 1}},
+        ],
+        stats=[
+            {"name": "_id_", "accesses": {"ops": 0}},
+            {"name": "spaces_category", "accesses": {"ops": 12}},
+            {"name": "legacy_name", "accesses": {"ops": 0}},
+        ],
+    )
+    collections = {name: fake_collection() for name in indexes.INDEXES}
+    collections["products"] = products
+
+    with patch("backend.api.db.indexes.database.get_collection", side_effect=collections.get):
+        report = await indexes.index_report()
+
+    assert report["products"] == {
+        "missing": ["purchase_link_unique", "styles_category"],
+        "unexpected": ["legacy_name"],
+        "unused": ["legacy_name"],
+    }
+    assert report["users"]["unused"] is None
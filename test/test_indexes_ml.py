@@ -0,0 +1,206 @@
+def test_product_similarity_index_most_similar():
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    index = ProductSimilarityIndex()
+    index.build(
+        ["lamp", "desk_lamp", "sofa", "rug"],
+        [
+            "brass floor lamp with linen shade",
+            "brass desk lamp with adjustable arm",
+            "grey three seat sofa with linen cushions",
+            "wool rug with geometric pattern",
+        ],
+    )
+
+    neighbors = index.most_similar("lamp", top_n=2)
+
+    assert [pid for pid, _ in neighbors][0] == "desk_lamp"
+    assert "lamp" not in [pid for pid, _ in neighbors]
+    assert len(neighbors) == 2
+
+
+def test_product_similarity_index_incremental_updates():
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    index = ProductSimilarityIndex()
+    index.build(["lamp", "sofa"], ["brass floor lamp", "grey linen sofa"])
+
+    index.upsert("table_lamp", "small brass table lamp")
+    assert index.most_similar("lamp", top_n=1)[0][0] == "table_lamp"
+
+    index.remove("table_lamp")
+    assert "table_lamp" not in index
+    assert [pid for pid, _ in index.most_similar("lamp", top_n=5)] == ["sofa"]
+
+    index.upsert("sofa", "brass lamp sofa")
+    assert len(index) == 2
+    assert index.most_similar("lamp", top_n=1)[0][0] == "sofa"
+
+
+def test_product_similarity_index_top_k_table_matches_most_similar():
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    index = ProductSimilarityIndex()
+    index.build(
+        ["a", "b", "c", "d"],
+        ["oak dining table", "oak coffee table", "linen sofa cushion", "linen bed sheet"],
+    )
+    index.remove("d")
+
+    table = dict(index.top_k_table(k=2, batch_size=2))
+
+    assert set(table) == {"a", "b", "c"}
+    for product_id, neighbors in table.items():
+        assert neighbors == index.most_similar(product_id, top_n=2)
+
+
+def _clustered_vectors(n=600, dim=16, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(12, dim))
+    return centers[rng.integers(0, 12, n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def test_ivf_index_matches_exact_search():
+    import numpy as np
+    from backend.api.ml.ann_index import IVFIndex, normalize
+
+    vectors = _clustered_vectors()
+    ids = [f"p{i}" for i in range(len(vectors))]
+    index = IVFIndex(nlist=12, nprobe=12, exact_threshold=0)
+    index.build(ids, vectors)
+
+    query = vectors[0]
+    expected = np.argsort(-(normalize(vectors) @ normalize(query)))[1:6]
+    neighbors = index.most_similar("p0", top_n=5)
+
+    assert [pid for pid, _ in neighbors] == [ids[i] for i in expected]
+
+
+def test_ivf_index_filters_and_incremental_updates():
+    from backend.api.ml.ann_index import IVFIndex
+
+    vectors = _clustered_vectors(n=40)
+    metadata = [{"spaces": ["s1"] if i % 2 else ["s2"], "styles": ["st1"], "category": "lamp" if i < 20 else "sofa"} for i in range(40)]
+    index = IVFIndex(nlist=4, nprobe=1, exact_threshold=0)
+    index.build([f"p{i}" for i in range(40)], vectors, metadata)
+
+    results = index.search(vectors[1], 10, {"spaces": "s1", "styles": "st1", "category": ["lamp"]})
+    assert results and all(int(pid[1:]) % 2 == 1 and int(pid[1:]) < 20 for pid, _ in results)
+
+    index.upsert("new", vectors[1], {"spaces": ["s1"], "styles": ["st1"], "category": "lamp"})
+    index.remove("p1")
+    results = index.search(vectors[1], 3, {"spaces": "s1"})
+    assert results[0][0] == "new"
+    assert "p1" not in [pid for pid, _ in results]
+    assert index.search(vectors[1], 3, {"spaces": "missing"}) == []
+
+
+def test_ivf_index_save_and_mmap_load(tmp_path):
+    import numpy as np
+    from backend.api.ml.ann_index import IVFIndex
+
+    vectors = _clustered_vectors(n=100)
+    index = IVFIndex(nlist=5)
+    index.build([f"p{i}" for i in range(100)], vectors, [{"category": "lamp"}] * 100)
+    index.upsert("extra", vectors[3], {"category": "sofa"})
+    index.remove("p0")
+    index.save(str(tmp_path))
+
+    loaded = IVFIndex()
+    loaded.load(str(tmp_path), mmap=True)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert len(loaded) == 100 and "extra" in loaded and "p0" not in loaded
+    assert loaded.search(vectors[3], 1, {"category": "sofa"})[0][0] == "extra"
+    assert loaded.most_similar("p5", 3) == index.most_similar("p5", 3)
+
+
+def test_ranker_matches_full_sort_with_offset():
+    import numpy as np
+    from backend.api.ml.ranking import Ranker
+
+    rng = np.random.default_rng(0)
+    products = [{"rating": float(r), "review_count": int(c)} for r, c in zip(rng.uniform(0, 5, 200), rng.integers(0, 50, 200))]
+    similarity = rng.random(200)
+    ranker = Ranker(similarity_weight=0.6, quality_weight=0.4)
+
+    quality = np.array([p["rating"] * p["review_count"] for p in products])
+    expected = np.argsort(-(0.6 * similarity + 0.4 * (quality - quality.min()) / (quality.max() - quality.min())), kind="stable")
+
+    assert list(ranker.rank(ranker.quality(products), similarity, offset=15, limit=10)) == list(expected[15:25])
+    assert list(ranker.rank(ranker.quality(products), offset=0, limit=5)) == list(np.argsort(-quality, kind="stable")[:5])
+    assert len(ranker.rank(ranker.quality(products), similarity, offset=195, limit=10)) == 5
+
+
+def test_top_indices_pages_over_ties_without_duplicates():
+    import numpy as np
+    from backend.api.ml.ranking import top_indices
+
+    rng = np.random.default_rng(1)
+    scores = np.zeros(2000)
+    scores[rng.choice(2000, 50, replace=False)] = rng.random(50)
+
+    pages = np.concatenate([top_indices(scores, offset, 20) for offset in range(0, 200, 20)])
+
+    assert len(set(pages.tolist())) == 200
+    assert list(pages) == list(np.lexsort((np.arange(2000), -scores))[:200])
+
+
+def test_product_similarity_index_candidate_rows_and_attributes():
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    index = ProductSimilarityIndex()
+    index.build(
+        ["lamp", "sofa", "rug"],
+        ["brass floor lamp", "grey linen sofa", "wool rug"],
+        [
+            {"spaces": ["living"], "styles": ["nordic"], "category": "lighting", "rating": 4.0, "review_count": 2},
+            {"spaces": ["living"], "styles": ["rustic"], "category": "seating", "rating": 5.0, "review_count": 1},
+            {"spaces": ["bedroom"], "styles": ["nordic"], "category": "rugs", "rating": 3.0, "review_count": 3},
+        ],
+    )
+
+    rows = index.candidate_rows({"spaces": "living", "styles": "nordic"})
+    assert [index.ids[row] for row in rows] == ["lamp"]
+
+    index.upsert("desk_lamp", "brass desk lamp", {"spaces": ["living"], "styles": ["nordic"], "category": "lighting", "rating": 2.0, "review_count": 1})
+    index.set_attributes("lamp", {"styles": ["rustic"], "review_count": 5})
+    index.remove("rug")
+
+    rows = index.candidate_rows({"spaces": "living", "styles": ["nordic", "rustic"], "category": ["lighting"]})
+    assert sorted(index.ids[row] for row in rows) == ["desk_lamp", "lamp"]
+    assert [index.ids[row] for row in index.candidate_rows({"styles": "nordic"})] == ["desk_lamp"]
+    assert index.column("review_count")[index.rows["lamp"]] == 5
+
+    scores = index.score_rows(index.vector("lamp"), rows)
+    assert scores.max() > 0.99
+
+
+def test_index_snapshots_are_isolated_from_later_writes():
+    import numpy as np
+    from backend.api.ml.ann_index import IVFIndex
+    from backend.api.ml.product_index import ProductSimilarityIndex
+
+    tfidf = ProductSimilarityIndex(compact_ratio=0.0)
+    tfidf.build(["lamp", "sofa", "rug"], ["brass floor lamp", "grey linen sofa", "wool floor rug"])
+    snapshot = tfidf.snapshot()
+    tfidf.upsert("chair", "linen chair")
+    tfidf.remove("rug")
+    tfidf.vector("lamp")
+
+    assert [pid for pid, _ in snapshot.top_k_table(2)] == ["lamp", "sofa", "rug"]
+    assert snapshot.matrix.shape[0] == len(snapshot.ids) == 3
+
+    rng = np.random.default_rng(0)
+    ivf = IVFIndex(nlist=2, exact_threshold=0)
+    ivf.build([f"p{i}" for i in range(20)], rng.random((20, 4)))
+    ivf.upsert("extra", rng.random(4))
+    snapshot = ivf.snapshot()
+    table = snapshot.top_k_table(3)
+    next(table)
+    ivf.upsert("late", rng.random(4))
+    ivf.remove("p1")
+
+    rows = [pid for pid, _ in table]
+    assert "late" not in rows and "p1" in rows and "extra" in rows
@@ -1,5 +1,5 @@
 from backend.api.ml.categorization import categorize_product_by_description, model, category_labels
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 import pytest
 
 @pytest.mark.asyncio
@@ -49,3 +49,141 @@ async def test_categorize_product_by_description_with_more_options():
     assert isinstance(category, str)
     assert isinstance(spaces, list) and len(spaces) == 3
     assert isinstance(styles, list) and len(styles) == 3
+
+
+def test_label_embedding_cache_encodes_each_label_once(tmp_path):
+    import numpy as np
+    from backend.api.ml.embedding_cache import LabelEmbeddingCache
+
+    calls = []
+
+    def encode(labels):
+        calls.append(list(labels))
+        return np.array([[float(len(label)), 1.0] for label in labels])
+
+    cache = LabelEmbeddingCache(encode, str(tmp_path))
+    first = cache.get(["sofa", "lamp"])
+    second = cache.get(["lamp", "rug", "sofa"])
+
+    assert calls == [["sofa", "lamp"], ["rug"]]
+    assert first.shape == (2, 2)
+    assert np.array_equal(second[0], first[1])
+
+    restarted = LabelEmbeddingCache(encode, str(tmp_path))
+    restarted.get(["rug", "sofa", "lamp"])
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_categorize_descriptions_encodes_batch_once():
+    from backend.api.ml.categorization import categorize_descriptions
+
+    descriptions = [
+        "Rustic wooden chair for outdoor terrace",
+        "Minimalist white desk lamp for the office",
+        "Soft wool rug for the bedroom",
+    ]
+    space_names = ["terrace", "office", "bedroom"]
+    style_names = ["rustic", "minimalist"]
+
+    category_embeddings = model.encode(category_labels, convert_to_tensor=True)
+    space_embeddings = model.encode(space_names, convert_to_tensor=True)
+    style_embeddings = model.encode(style_names, convert_to_tensor=True)
+
+    with patch.object(model, "encode", wraps=model.encode) as mock_encode:
+        results = await categorize_descriptions(
+            descriptions,
+            category_embeddings,
+            space_embeddings,
+            style_embeddings,
+            space_names,
+            style_names,
+            n_spaces=2,
+            n_styles=3
+        )
+
+    assert mock_encode.call_count == 1
+    assert len(results) == 3
+    for category, spaces, styles in results:
+        assert category in category_labels
+        assert len(spaces) == 2 and set(spaces) <= set(space_names)
+        assert sorted(styles) == sorted(style_names)
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_micro_batches_concurrent_requests():
+    import asyncio
+    import numpy as np
+    from backend.api.ml.inference import InferenceExecutor
+
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(text))] for text in texts])
+
+    executor = InferenceExecutor(encode, workers=1, max_batch=8, max_wait=0.05)
+    results = await asyncio.gather(*(executor.encode(["x" * i]) for i in range(1, 6)))
+    large = await executor.encode(["y"] * 8)
+    executor.shutdown()
+
+    assert calls[0] == ["x", "xx", "xxx", "xxxx", "xxxxx"]
+    assert [r.tolist() for r in results] == [[[1.0]], [[2.0]], [[3.0]], [[4.0]], [[5.0]]]
+    assert len(calls) == 2 and large.shape == (8, 1)
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_model_state(async_client):
+    with patch("backend.api.services.categorization_service.is_model_loaded", return_value=False), \
+         patch.dict("backend.api.services.categorization_service.warm_up_state", {"gave_up": False, "error": None}):
+        response = await async_client.get("/api/v1/ready")
+    assert response.status_code == 503
+    assert response.json()["model_loaded"] is False
+
+    with patch("backend.api.services.categorization_service.is_model_loaded", return_value=True):
+        response = await async_client.get("/api/v1/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_retries_then_reports_ready_with_error(async_client):
+    from backend.api.services import categorization_service
+
+    with patch.dict(categorization_service.warm_up_state, {"attempts": 0, "gave_up": False, "error": None}), \
+         patch("backend.api.services.categorization_service.MODEL_WARM_UP", True), \
+         patch("backend.api.services.categorization_service.CATEGORIZATION_ENABLED", True), \
+         patch("backend.api.services.categorization_service.is_model_loaded", return_value=False), \
+         patch("backend.api.services.categorization_service.load_embeddings", AsyncMock(side_effect=RuntimeError("mongo down"))) as mock_load:
+        await categorization_service.warm_up_categorization(retries=2, backoff=0)
+        response = await async_client.get("/api/v1/ready")
+
+    assert mock_load.await_count == 3
+    assert response.status_code == 200
+    assert response.json()["model_loaded"] is False
+    assert response.json()["warm_up_error"] == "mongo down"
+
+
+def test_model_is_loaded_lazily():
+    import subprocess
+    import sys
+
+    code = (
+        "import backend.api.main; "
+        "from backend.api.ml import categorization; "
+        "assert not categorization.is_model_loaded()"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_load_encoder_selects_backend():
+    from backend.api.ml.encoders import load_encoder
+
+    with patch("sentence_transformers.SentenceTransformer") as mock_st:
+        load_encoder("all-mpnet-base-v2", "onnx", "onnx/model_qint8_avx2.onnx")
+    mock_st.assert_called_once_with(
+        "all-mpnet-base-v2", backend="onnx", model_kwargs={"file_name": "onnx/model_qint8_avx2.onnx"}
+    )
+
+    with pytest.raises(ValueError):
+        load_encoder("all-mpnet-base-v2", "tensorrt")
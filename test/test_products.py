@@ -236,3 +236,29 @@ async def test_delete_all_products_success(async_client, override_is_admin):
 
     assert response.status_code == 200
     assert response.json() == {"message": "All products deleted successfully"}
+
+
+# POST /products/import/jobs
+@pytest.mark.asyncio
+async def test_submit_import_job_rejects_unsupported_files(async_client, override_is_admin):
+    response = await async_client.post("/api/v1/products/import/jobs", files={"file": ("products.json", b"[]")})
+
+    assert response.status_code == 400
+
+
+# POST /products/bulk/jobs
+@pytest.mark.asyncio
+async def test_submit_bulk_job_returns_job(async_client, override_is_admin):
+    from datetime import datetime, timezone
+    from backend.api.schemas.jobs import JobRead
+
+    job = JobRead(id="job1", kind="product_bulk", status="queued", created_at=datetime.now(timezone.utc))
+    product = {"name": "Mesa", "description": "Mesa de roble", "price": 120.0,
+               "purchase_link": "http://example.com/mesa", "image_url": "http://example.com/mesa.jpg"}
+
+    with patch("backend.api.services.product_import_service.submit_bulk_job", return_value=job) as mock_submit:
+        response = await async_client.post("/api/v1/products/bulk/jobs", json=[product])
+
+    assert response.status_code == 202
+    assert response.json()["id"] == "job1"
+    assert len(mock_submit.call_args.args[0]) == 1